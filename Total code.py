@@ -1,14 +1,269 @@
-import tkinter as tk
-from tkinter import ttk, messagebox
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+import argparse
+import csv
+import json
+import itertools
+import mmap
+import os
+import platform
+import queue
 import random
+import heapq
+import struct
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from array import array
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+def import_gui():
+    # tkinter and matplotlib are only needed by the GUI, so batch runs skip loading them
+    global tk, ttk, messagebox, plt, FigureCanvasTkAgg, np, to_rgb
+    import tkinter as tk
+    from tkinter import ttk, messagebox
+    import numpy as np
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from matplotlib.colors import to_rgb
+
+class ReplacementPolicy:
+    # A policy tracks resident pages only: hit() on every hit, admit() after a faulting page gets a frame,
+    # and evict(incoming) when memory is full, returning the resident page to give up its frame.
+    # get_state()/set_state() carry the policy through checkpoints as int counters and page columns;
+    # by default they cover the attributes named in `counters` and the deques/OrderedDicts in `queues`.
+    name = None
+    counters = ()
+    queues = ()
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+
+    def get_state(self):
+        return [getattr(self, name) for name in self.counters], [array('q', getattr(self, name)) for name in self.queues]
+
+    def set_state(self, counters, columns):
+        for name, value in zip(self.counters, counters):
+            setattr(self, name, value)
+        for name, column in zip(self.queues, columns):
+            queue = getattr(self, name)
+            if isinstance(queue, deque):
+                queue.extend(column)
+            else:
+                queue.update(dict.fromkeys(column))
+
+    def hit(self, page):
+        pass
+
+    def admit(self, page):
+        raise NotImplementedError
+
+    def evict(self, incoming):
+        raise NotImplementedError
+
+class FIFOPolicy(ReplacementPolicy):
+    name = 'fifo'
+    queues = ('queue',)
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.queue = deque()
+
+    def admit(self, page):
+        self.queue.append(page)
+
+    def evict(self, incoming):
+        return self.queue.popleft()
+
+class ClockPolicy(ReplacementPolicy):
+    # Second chance: the hand clears reference bits until it finds an unreferenced page
+    name = 'clock'
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.slots = []
+        self.referenced = bytearray(capacity)
+        self.slot_of = {}
+        self.hand = 0
+
+    def hit(self, page):
+        self.referenced[self.slot_of[page]] = 1
+
+    def admit(self, page):
+        if len(self.slot_of) < len(self.slots):
+            slot = self.hand  # the slot freed by the last evict()
+            self.slots[slot] = page
+            self.hand = (slot + 1) % len(self.slots)
+        else:
+            slot = len(self.slots)
+            self.slots.append(page)
+        self.slot_of[page] = slot
+        self.referenced[slot] = 0
+
+    def evict(self, incoming):
+        while self.referenced[self.hand]:
+            self.referenced[self.hand] = 0
+            self.hand = (self.hand + 1) % len(self.slots)
+        victim = self.slots[self.hand]
+        del self.slot_of[victim]
+        return victim
+
+    def get_state(self):
+        return [self.hand], [array('q', self.slots), array('q', list(self.referenced))]
+
+    def set_state(self, counters, columns):
+        self.hand, = counters
+        slots, referenced = columns
+        self.slots = list(slots)
+        self.slot_of = {page: slot for slot, page in enumerate(self.slots)}
+        self.referenced[:len(referenced)] = bytes(referenced.tolist())
+
+class LFUPolicy(ReplacementPolicy):
+    # Pages sit in per-frequency buckets ordered by recency, so hits and evictions are O(1)
+    name = 'lfu'
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.frequency = {}
+        self.buckets = {}
+        self.min_frequency = 0
+
+    def hit(self, page):
+        count = self.frequency[page]
+        bucket = self.buckets[count]
+        del bucket[page]
+        if not bucket:
+            del self.buckets[count]
+            if self.min_frequency == count:
+                self.min_frequency = count + 1
+        self.frequency[page] = count + 1
+        self.buckets.setdefault(count + 1, OrderedDict())[page] = None
+
+    def admit(self, page):
+        self.frequency[page] = 1
+        self.buckets.setdefault(1, OrderedDict())[page] = None
+        self.min_frequency = 1
+
+    def evict(self, incoming):
+        bucket = self.buckets[self.min_frequency]
+        victim, _ = bucket.popitem(last=False)
+        if not bucket:
+            del self.buckets[self.min_frequency]
+        del self.frequency[victim]
+        return victim
+
+    def get_state(self):
+        # pages bucket by bucket, each bucket in recency order, so set_state rebuilds the same order
+        pages = array('q', (page for bucket in self.buckets.values() for page in bucket))
+        return [self.min_frequency], [pages, array('q', (self.frequency[page] for page in pages))]
+
+    def set_state(self, counters, columns):
+        self.min_frequency, = counters
+        for page, count in zip(*columns):
+            self.frequency[page] = count
+            self.buckets.setdefault(count, OrderedDict())[page] = None
+
+class ARCPolicy(ReplacementPolicy):
+    # Adaptive Replacement Cache (Megiddo & Modha): t1/t2 hold resident pages seen once/more than once,
+    # b1/b2 are ghost lists of their recent evictions, and target is the adaptive size goal for t1
+    name = 'arc'
+    counters = ('target',)
+    queues = ('t1', 't2', 'b1', 'b2')
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.t1, self.t2 = OrderedDict(), OrderedDict()
+        self.b1, self.b2 = OrderedDict(), OrderedDict()
+        self.target = 0
+
+    def hit(self, page):
+        if page in self.t1:
+            del self.t1[page]
+        else:
+            del self.t2[page]
+        self.t2[page] = None
+
+    def admit(self, page):
+        if page in self.b1:
+            del self.b1[page]
+            self.t2[page] = None
+        elif page in self.b2:
+            del self.b2[page]
+            self.t2[page] = None
+        else:
+            self.t1[page] = None
+
+    def replace(self, incoming):
+        if self.t1 and (len(self.t1) > self.target or (incoming in self.b2 and len(self.t1) == self.target)):
+            victim, _ = self.t1.popitem(last=False)
+            self.b1[victim] = None
+        else:
+            victim, _ = self.t2.popitem(last=False)
+            self.b2[victim] = None
+        return victim
+
+    def evict(self, incoming):
+        c = self.capacity
+        if incoming in self.b1:
+            self.target = min(c, self.target + max(len(self.b2) // len(self.b1), 1))
+            return self.replace(incoming)
+        if incoming in self.b2:
+            self.target = max(0, self.target - max(len(self.b1) // len(self.b2), 1))
+            return self.replace(incoming)
+        if len(self.t1) + len(self.b1) == c:
+            if len(self.t1) < c:
+                self.b1.popitem(last=False)
+                return self.replace(incoming)
+            victim, _ = self.t1.popitem(last=False)
+            return victim
+        if len(self.t1) + len(self.t2) + len(self.b1) + len(self.b2) == 2 * c:
+            self.b2.popitem(last=False)
+        return self.replace(incoming)
+
+class TwoQueuePolicy(ReplacementPolicy):
+    # Full 2Q (Johnson & Shasha): first-time pages enter the a1_in FIFO, pages re-referenced after
+    # falling out of it (tracked by the a1_out ghost FIFO) are promoted to the am LRU queue
+    name = '2q'
+    queues = ('a1_in', 'a1_out', 'am')
+
+    def __init__(self, capacity):
+        super().__init__(capacity)
+        self.in_size = max(1, capacity // 4)
+        self.out_size = max(1, capacity // 2)
+        self.a1_in, self.a1_out, self.am = OrderedDict(), OrderedDict(), OrderedDict()
+
+    def hit(self, page):
+        if page in self.am:
+            self.am.move_to_end(page)
+
+    def admit(self, page):
+        if page in self.a1_out:
+            del self.a1_out[page]
+            self.am[page] = None
+        else:
+            self.a1_in[page] = None
+
+    def evict(self, incoming):
+        if len(self.a1_in) > self.in_size or not self.am:
+            victim, _ = self.a1_in.popitem(last=False)
+            self.a1_out[victim] = None
+            if len(self.a1_out) > self.out_size:
+                self.a1_out.popitem(last=False)
+        else:
+            victim, _ = self.am.popitem(last=False)
+        return victim
+
+REPLACEMENT_POLICIES = {policy.name: policy for policy in (FIFOPolicy, ClockPolicy, LFUPolicy, ARCPolicy, TwoQueuePolicy)}
+
+FREE_PAGE = -(1 << 63)  # page number column value for a free frame; any other int64 page number is valid
 
 class MemoryManager:
     def __init__(self, page_size, total_memory, segment_sizes):
         self.page_size = page_size
         self.total_memory = total_memory
-        self.page_table = {}
+        self.page_table = OrderedDict()
+        self.clock = 0
         self.physical_memory = [None] * (total_memory // page_size)
         self.page_faults = 0
         self.page_replacements = 0
@@ -16,6 +271,9 @@ class MemoryManager:
         self.segment_table = {}
         self.fragmentation = {'internal': 0, 'external': 0}
         self.free_frames = set(range(total_memory // page_size))
+        self.opt_heap = []
+        self.policy = None
+        self.eviction_probes = 0
         self.initialize_segments()
 
     def initialize_segments(self):
@@ -31,22 +289,26 @@ class MemoryManager:
         if segment_id not in self.segment_table:
             return False
 
-        if page_number in self.page_table:
-            self.page_table[page_number]['last_used'] = self.page_table[page_number].get('last_used', 0) + 1
+        self.clock += 1
+        entry = self.page_table.get(page_number)
+        if entry is not None:
+            # page_table is kept in recency order: least recently used first
+            entry['last_used'] = self.clock
+            self.page_table.move_to_end(page_number)
             return True
 
         self.page_faults += 1
         if not self.free_frames:
-            lru_page = min(self.page_table.items(), key=lambda x: x[1]['last_used'])[0]
-            frame = self.page_table[lru_page]['physical_frame']
+            lru_page, lru_entry = self.page_table.popitem(last=False)
+            frame = lru_entry['physical_frame']
             self.physical_memory[frame] = None
             self.free_frames.add(frame)
-            del self.page_table[lru_page]
             self.page_replacements += 1
+            self.eviction_probes += 1
 
         frame = self.free_frames.pop()
         self.physical_memory[frame] = page_number
-        self.page_table[page_number] = {'last_used': 0, 'physical_frame': frame, 'segment_id': segment_id}
+        self.page_table[page_number] = {'last_used': self.clock, 'physical_frame': frame, 'segment_id': segment_id}
         return False
 
     def optimal_page_replacement(self, page_number, segment_id, future_sequence):
@@ -60,6 +322,7 @@ class MemoryManager:
         if not self.free_frames:
             page_to_replace = None
             max_future_index = -1
+            self.eviction_probes += len(self.page_table)
             for page in self.page_table:
                 try:
                     future_index = future_sequence.index(page)
@@ -81,11 +344,1745 @@ class MemoryManager:
         self.page_table[page_number] = {'last_used': 0, 'physical_frame': frame, 'segment_id': segment_id}
         return False
 
+    def indexed_optimal_page_replacement(self, page_number, segment_id, next_use):
+        # next_use is the index of the next reference to page_number (see compute_next_use);
+        # opt_heap is a max-heap of resident pages by next use with lazily dropped stale keys
+        entry = self.page_table.get(page_number)
+        if entry is not None:
+            entry['next_use'] = next_use
+            self.push_next_use(next_use, page_number)
+
+        if segment_id not in self.segment_table:
+            return False
+
+        if entry is not None:
+            return True
+
+        self.page_faults += 1
+        if not self.free_frames:
+            while True:
+                neg_next_use, page_to_replace = heapq.heappop(self.opt_heap)
+                self.eviction_probes += 1
+                victim = self.page_table.get(page_to_replace)
+                if victim is not None and victim['next_use'] == -neg_next_use:
+                    break
+            frame = victim['physical_frame']
+            self.physical_memory[frame] = None
+            self.free_frames.add(frame)
+            del self.page_table[page_to_replace]
+            self.page_replacements += 1
+
+        frame = self.free_frames.pop()
+        self.physical_memory[frame] = page_number
+        self.page_table[page_number] = {'last_used': self.clock, 'physical_frame': frame, 'segment_id': segment_id,
+                                        'next_use': next_use}
+        self.push_next_use(next_use, page_number)
+        return False
+
+    def push_next_use(self, next_use, page_number):
+        # rebuilding once stale keys outnumber live ones keeps opt_heap O(resident pages), amortized O(1) per push
+        heapq.heappush(self.opt_heap, (-next_use, page_number))
+        if len(self.opt_heap) > 2 * len(self.page_table) + 16:
+            self.opt_heap = [(-info['next_use'], page) for page, info in self.page_table.items()]
+            heapq.heapify(self.opt_heap)
+
+    def use_policy(self, name):
+        if self.policy is None or self.policy.name != name:
+            self.policy = REPLACEMENT_POLICIES[name](len(self.physical_memory))
+            for page in self.page_table:
+                self.policy.admit(page)
+
+    def seed_next_use(self, first_use, never):
+        # OPT starting on a warm manager: key each resident page by its first use in the coming trace
+        for page, entry in self.page_table.items():
+            entry['next_use'] = first_use.get(page, never)
+        self.opt_heap = [(-entry['next_use'], page) for page, entry in self.page_table.items()]
+        heapq.heapify(self.opt_heap)
+
+    def policy_page_replacement(self, page_number, segment_id):
+        if segment_id not in self.segment_table:
+            return False
+
+        self.clock += 1
+        entry = self.page_table.get(page_number)
+        if entry is not None:
+            entry['last_used'] = self.clock
+            self.policy.hit(page_number)
+            return True
+
+        self.page_faults += 1
+        if not self.free_frames:
+            page_to_replace = self.policy.evict(page_number)
+            self.eviction_probes += 1
+            frame = self.page_table.pop(page_to_replace)['physical_frame']
+            self.physical_memory[frame] = None
+            self.free_frames.add(frame)
+            self.page_replacements += 1
+
+        frame = self.free_frames.pop()
+        self.physical_memory[frame] = page_number
+        self.page_table[page_number] = {'last_used': self.clock, 'physical_frame': frame, 'segment_id': segment_id}
+        self.policy.admit(page_number)
+        return False
+
     def demand_page(self, page_number, segment_id):
         if page_number not in self.page_table:
             self.lru_page_replacement(page_number, segment_id)
 
+    def lookup_frame(self, page_number):
+        entry = self.page_table.get(page_number)
+        return -1 if entry is None else entry['physical_frame']
+
+    def frame_layout(self):
+        return [None if page is None else (page, self.page_table[page]['segment_id']) for page in self.physical_memory]
+
+    def frame_snapshot(self):
+        # (page per frame, segment per frame) with FREE_PAGE for a free frame's page
+        pages = [FREE_PAGE if page is None else page for page in self.physical_memory]
+        segments = [0 if page is None else self.page_table[page]['segment_id'] for page in self.physical_memory]
+        return pages, segments
+
+class CompactMemoryManager:
+    # Same replacement semantics as MemoryManager, but the frame map lives in typed array columns indexed
+    # by frame, with LRU order kept as an intrusive doubly linked list over frames. Resident pages are
+    # found through an open-addressing hash table (linear probing, backward-shift deletion) held in two
+    # more arrays of at least twice the frame count, so memory follows the frame count, never the largest
+    # page number, and nothing is allocated per page.
+    __slots__ = ('page_size', 'total_memory', 'segments', 'segment_table', 'fragmentation',
+                 'page_faults', 'page_replacements', 'clock', 'frame_count',
+                 'frame_page', 'frame_segment', 'frame_stamp', 'frame_next_use',
+                 'table_page', 'table_frame', 'table_mask',
+                 'lru_prev', 'lru_next', 'free_stack', 'free_count', 'opt_heap', 'policy',
+                 'eviction_probes')
+
+    HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+    initialize_segments = MemoryManager.initialize_segments
+
+    def __init__(self, page_size, total_memory, segment_sizes):
+        self.page_size = page_size
+        self.total_memory = total_memory
+        self.page_faults = 0
+        self.page_replacements = 0
+        self.clock = 0
+        self.segments = segment_sizes if segment_sizes else [total_memory]
+        self.segment_table = {}
+        self.fragmentation = {'internal': 0, 'external': 0}
+        frames = self.frame_count = total_memory // page_size
+        self.frame_page = array('q', [FREE_PAGE]) * frames
+        self.frame_segment = array('i', [0]) * frames
+        self.frame_stamp = array('q', [0]) * frames
+        self.frame_next_use = array('q', [0]) * frames
+        capacity = 1 << max(1, (2 * frames - 1).bit_length())
+        self.table_page = array('q', [FREE_PAGE]) * capacity
+        self.table_frame = array('i', [-1]) * capacity
+        self.table_mask = capacity - 1
+        # index `frames` is the list sentinel: lru_next[frames] is the LRU frame, lru_prev[frames] the MRU one
+        self.lru_prev = array('i', [frames]) * (frames + 1)
+        self.lru_next = array('i', [frames]) * (frames + 1)
+        self.free_stack = array('i', range(frames - 1, -1, -1))
+        self.free_count = frames
+        self.opt_heap = []
+        self.policy = None
+        self.eviction_probes = 0
+        self.initialize_segments()
+
+    @property
+    def physical_memory(self):
+        return [None if page == FREE_PAGE else page for page in self.frame_page]
+
+    @property
+    def free_frames(self):
+        return set(self.free_stack[:self.free_count])
+
+    def frame_layout(self):
+        return [None if page == FREE_PAGE else (page, self.frame_segment[frame]) for frame, page in enumerate(self.frame_page)]
+
+    def frame_snapshot(self):
+        return array('q', self.frame_page), array('i', self.frame_segment)
+
+    def table_slot(self, page_number):
+        # the slot holding page_number, or the empty slot that ends its probe sequence
+        mask, table_page = self.table_mask, self.table_page
+        slot = (page_number * self.HASH_MULTIPLIER >> 32) & mask
+        while True:
+            page = table_page[slot]
+            if page == page_number or page == FREE_PAGE:
+                return slot
+            slot = (slot + 1) & mask
+
+    def lookup_frame(self, page_number):
+        mask, table_page = self.table_mask, self.table_page
+        slot = (page_number * self.HASH_MULTIPLIER >> 32) & mask
+        while True:
+            page = table_page[slot]
+            if page == page_number:
+                return self.table_frame[slot]
+            if page == FREE_PAGE:
+                return -1
+            slot = (slot + 1) & mask
+
+    def map_page(self, page_number, frame):
+        slot = self.table_slot(page_number)
+        self.table_page[slot] = page_number
+        self.table_frame[slot] = frame
+
+    def unmap_page(self, page_number):
+        mask, table_page, table_frame = self.table_mask, self.table_page, self.table_frame
+        hole = self.table_slot(page_number)
+        slot = (hole + 1) & mask
+        while table_page[slot] != FREE_PAGE:
+            home = (table_page[slot] * self.HASH_MULTIPLIER >> 32) & mask
+            # an entry may fill the hole unless its home lies cyclically in (hole, slot]
+            if (slot - home) & mask >= (slot - hole) & mask:
+                table_page[hole] = table_page[slot]
+                table_frame[hole] = table_frame[slot]
+                hole = slot
+            slot = (slot + 1) & mask
+        table_page[hole] = FREE_PAGE
+        table_frame[hole] = -1
+
+    def unlink_frame(self, frame):
+        prev, nxt = self.lru_prev[frame], self.lru_next[frame]
+        self.lru_next[prev] = nxt
+        self.lru_prev[nxt] = prev
+
+    def append_frame(self, frame):
+        sentinel = self.frame_count
+        tail = self.lru_prev[sentinel]
+        self.lru_next[tail] = frame
+        self.lru_prev[frame] = tail
+        self.lru_next[frame] = sentinel
+        self.lru_prev[sentinel] = frame
+
+    def evict_frame(self, frame):
+        self.unlink_frame(frame)
+        self.unmap_page(self.frame_page[frame])
+        self.frame_page[frame] = FREE_PAGE
+        self.free_stack[self.free_count] = frame
+        self.free_count += 1
+        self.page_replacements += 1
+
+    def allocate_frame(self, page_number, segment_id):
+        self.free_count -= 1
+        frame = self.free_stack[self.free_count]
+        self.frame_page[frame] = page_number
+        self.frame_segment[frame] = segment_id
+        self.frame_stamp[frame] = self.clock
+        self.map_page(page_number, frame)
+        self.append_frame(frame)
+        return frame
+
+    def lru_page_replacement(self, page_number, segment_id):
+        if segment_id not in self.segment_table:
+            return False
+
+        self.clock += 1
+        frame = self.lookup_frame(page_number)
+        if frame >= 0:
+            self.frame_stamp[frame] = self.clock
+            self.unlink_frame(frame)
+            self.append_frame(frame)
+            return True
+
+        self.page_faults += 1
+        if not self.free_count:
+            self.evict_frame(self.lru_next[self.frame_count])
+            self.eviction_probes += 1
+
+        self.allocate_frame(page_number, segment_id)
+        return False
+
+    def indexed_optimal_page_replacement(self, page_number, segment_id, next_use):
+        frame = self.lookup_frame(page_number)
+        if frame >= 0:
+            self.frame_next_use[frame] = next_use
+            self.push_next_use(next_use, frame)
+
+        if segment_id not in self.segment_table:
+            return False
+
+        if frame >= 0:
+            return True
+
+        self.page_faults += 1
+        if not self.free_count:
+            while True:
+                neg_next_use, frame = heapq.heappop(self.opt_heap)
+                self.eviction_probes += 1
+                if self.frame_page[frame] != FREE_PAGE and self.frame_next_use[frame] == -neg_next_use:
+                    break
+            self.evict_frame(frame)
+
+        frame = self.allocate_frame(page_number, segment_id)
+        self.frame_next_use[frame] = next_use
+        self.push_next_use(next_use, frame)
+        return False
+
+    def push_next_use(self, next_use, frame):
+        heapq.heappush(self.opt_heap, (-next_use, frame))
+        if len(self.opt_heap) > 2 * (self.frame_count - self.free_count) + 16:
+            self.opt_heap = [(-self.frame_next_use[f], f) for f in range(self.frame_count) if self.frame_page[f] != FREE_PAGE]
+            heapq.heapify(self.opt_heap)
+
+    def resident_frames(self):
+        # every resident frame, in the order MemoryManager keeps its page_table
+        frame = self.lru_next[self.frame_count]
+        while frame != self.frame_count:
+            yield frame
+            frame = self.lru_next[frame]
+
+    def use_policy(self, name):
+        if self.policy is None or self.policy.name != name:
+            self.policy = REPLACEMENT_POLICIES[name](self.frame_count)
+            for frame in self.resident_frames():
+                self.policy.admit(self.frame_page[frame])
+
+    def seed_next_use(self, first_use, never):
+        # OPT starting on a warm manager: key each resident page by its first use in the coming trace
+        for frame in self.resident_frames():
+            self.frame_next_use[frame] = first_use.get(self.frame_page[frame], never)
+        self.opt_heap = [(-self.frame_next_use[frame], frame) for frame in self.resident_frames()]
+        heapq.heapify(self.opt_heap)
+
+    def policy_page_replacement(self, page_number, segment_id):
+        if segment_id not in self.segment_table:
+            return False
+
+        self.clock += 1
+        frame = self.lookup_frame(page_number)
+        if frame >= 0:
+            self.frame_stamp[frame] = self.clock
+            self.policy.hit(page_number)
+            return True
+
+        self.page_faults += 1
+        if not self.free_count:
+            self.evict_frame(self.lookup_frame(self.policy.evict(page_number)))
+            self.eviction_probes += 1
+
+        self.allocate_frame(page_number, segment_id)
+        self.policy.admit(page_number)
+        return False
+
+    def demand_page(self, page_number, segment_id):
+        if self.lookup_frame(page_number) < 0:
+            self.lru_page_replacement(page_number, segment_id)
+
+MEMORY_BACKENDS = {'dict': MemoryManager, 'compact': CompactMemoryManager}
+
+# Checkpoint file: header, then fixed-width columns (segment sizes; per frame: page, segment, recency stamp,
+# next use; resident frames in LRU-to-MRU order), then the replacement policy's state as int64 words:
+# counter count, column count, the counters, then each column as its length followed by its pages.
+CHECKPOINT_MAGIC = b'VMCK'
+CHECKPOINT_VERSION = 3
+CHECKPOINT_HEADER = struct.Struct('<4sHBbqqqqqqqIIIq')
+CHECKPOINT_POLICIES = list(REPLACEMENT_POLICIES)
+CHECKPOINT_BACKENDS = ['dict', 'compact']
+
+def save_checkpoint(memory, path, trace_offset=0):
+    frames = len(memory.physical_memory) if isinstance(memory, MemoryManager) else memory.frame_count
+    frame_page = array('q', [FREE_PAGE]) * frames
+    frame_segment = array('i', [0]) * frames
+    frame_stamp = array('q', [0]) * frames
+    frame_next_use = array('q', [-1]) * frames
+    recency = array('i')
+    if isinstance(memory, MemoryManager):
+        backend = 'dict'
+        for page, entry in memory.page_table.items():
+            frame = entry['physical_frame']
+            frame_page[frame] = page
+            frame_segment[frame] = entry['segment_id']
+            frame_stamp[frame] = entry['last_used']
+            frame_next_use[frame] = entry.get('next_use', -1)
+            recency.append(frame)
+    else:
+        backend = 'compact'
+        frame_page, frame_segment = memory.frame_page, memory.frame_segment
+        frame_stamp, frame_next_use = memory.frame_stamp, memory.frame_next_use
+        frame = memory.lru_next[frames]
+        while frame != frames:
+            recency.append(frame)
+            frame = memory.lru_next[frame]
+    policy = array('q')
+    policy_index = -1
+    if memory.policy is not None:
+        policy_index = CHECKPOINT_POLICIES.index(memory.policy.name)
+        counters, columns = memory.policy.get_state()
+        policy.extend((len(counters), len(columns)))
+        policy.extend(counters)
+        for column in columns:
+            policy.append(len(column))
+            policy.extend(column)
+    header = CHECKPOINT_HEADER.pack(
+        CHECKPOINT_MAGIC, CHECKPOINT_VERSION, CHECKPOINT_BACKENDS.index(backend), policy_index, memory.page_size,
+        memory.total_memory, memory.page_faults, memory.page_replacements, memory.clock, memory.eviction_probes,
+        trace_offset, len(memory.segments), frames, len(recency), len(policy))
+    # write next to the target and rename, so a crash mid-write never leaves a torn checkpoint behind
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as f:
+        f.write(header)
+        array('q', memory.segments).tofile(f)
+        for column in (frame_page, frame_segment, frame_stamp, frame_next_use, recency, policy):
+            column.tofile(f)
+    os.replace(temp_path, path)
+
+def load_checkpoint(path):
+    # Returns (memory, trace_offset). Each load builds an independent manager, so one checkpoint can be
+    # resumed or branched into several runs with different policies.
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        (magic, version, backend_index, policy_index, page_size, total_memory, page_faults, page_replacements, clock,
+         eviction_probes, trace_offset, segment_count, frames, resident_count, policy_size) = CHECKPOINT_HEADER.unpack_from(mm)
+        if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+            raise ValueError(f"{path} is not a version {CHECKPOINT_VERSION} memory checkpoint")
+        position = CHECKPOINT_HEADER.size
+
+        def column(typecode, count):
+            nonlocal position
+            values = array(typecode)
+            values.frombytes(mm[position:position + count * values.itemsize])
+            position += count * values.itemsize
+            return values
+
+        segments = column('q', segment_count)
+        frame_page, frame_segment = column('q', frames), column('i', frames)
+        frame_stamp, frame_next_use = column('q', frames), column('q', frames)
+        recency = column('i', resident_count)
+        words = column('q', policy_size)
+
+    policy = None
+    if policy_index >= 0:
+        policy = REPLACEMENT_POLICIES[CHECKPOINT_POLICIES[policy_index]](frames)
+        counter_count, column_count = words[0], words[1]
+        position = 2 + counter_count
+        columns = []
+        for _ in range(column_count):
+            length = words[position]
+            columns.append(words[position + 1:position + 1 + length])
+            position += 1 + length
+        policy.set_state(words[2:2 + counter_count].tolist(), columns)
+
+    backend = CHECKPOINT_BACKENDS[backend_index]
+    memory = MEMORY_BACKENDS[backend](page_size, total_memory, segments.tolist())
+    if backend == 'dict':
+        for frame in recency:
+            page = frame_page[frame]
+            entry = {'last_used': frame_stamp[frame], 'physical_frame': frame, 'segment_id': frame_segment[frame]}
+            if frame_next_use[frame] >= 0:
+                entry['next_use'] = frame_next_use[frame]
+            memory.page_table[page] = entry
+            memory.physical_memory[frame] = page
+            memory.free_frames.discard(frame)
+        memory.opt_heap = [(-entry['next_use'], page) for page, entry in memory.page_table.items() if 'next_use' in entry]
+    else:
+        memory.frame_page, memory.frame_segment = frame_page, frame_segment
+        memory.frame_stamp, memory.frame_next_use = frame_stamp, frame_next_use
+        resident = [frame for frame in range(frames) if frame_page[frame] != FREE_PAGE]
+        for frame in resident:
+            memory.map_page(frame_page[frame], frame)
+        for frame in recency:
+            memory.append_frame(frame)
+        free = [frame for frame in range(frames - 1, -1, -1) if frame_page[frame] == FREE_PAGE]
+        memory.free_stack[:len(free)] = array('i', free)
+        memory.free_count = len(free)
+        memory.opt_heap = [(-frame_next_use[frame], frame) for frame in resident]
+    heapq.heapify(memory.opt_heap)
+    memory.page_faults = page_faults
+    memory.page_replacements = page_replacements
+    memory.clock = clock
+    memory.eviction_probes = eviction_probes
+    memory.policy = policy
+    return memory, trace_offset
+
+class ProcessSpace:
+    # One address space in MultiProcessMemoryManager: its own segment table and a page table kept in
+    # LRU order, page -> [frame, segment_id, last use in this process's virtual time]
+    __slots__ = ('pid', 'page_size', 'total_memory', 'segments', 'segment_table', 'fragmentation',
+                 'pages', 'clock', 'last_fault', 'page_faults', 'page_replacements')
+
+    initialize_segments = MemoryManager.initialize_segments
+
+    def __init__(self, pid, page_size, total_memory, segment_sizes):
+        self.pid = pid
+        self.page_size = page_size
+        self.total_memory = total_memory
+        self.segments = segment_sizes if segment_sizes else [total_memory]
+        self.segment_table = {}
+        self.fragmentation = {'internal': 0, 'external': 0}
+        self.pages = OrderedDict()
+        self.clock = 0
+        self.last_fault = 0
+        self.page_faults = 0
+        self.page_replacements = 0
+        self.initialize_segments()
+
+MULTIPROCESS_REPLACEMENT = ['global', 'local']
+MULTIPROCESS_ALLOCATION = ['fixed', 'working_set', 'pff']
+
+class MultiProcessMemoryManager:
+    # Many address spaces sharing one pool of frames. Replacement is 'global' (LRU over every resident
+    # page) or 'local' (LRU within the faulting process). Allocation is 'fixed' (an equal share of the
+    # frames per process under local replacement), 'working_set' (pages unused for `window` references of
+    # their process are released) or 'pff' (a process faulting again within `pff_threshold` references
+    # grows by taking the globally least recently used page; otherwise pages it has not used since its
+    # previous fault are released first and it replaces its own pages).
+    # Every access touches only the process's own tables and the global LRU, whatever the process count.
+    def __init__(self, page_size, total_memory, segment_sizes=None, replacement='global', allocation='fixed',
+                 window=1000, pff_threshold=100):
+        if replacement not in MULTIPROCESS_REPLACEMENT:
+            raise ValueError(f"Unknown replacement scope: {replacement}")
+        if allocation not in MULTIPROCESS_ALLOCATION:
+            raise ValueError(f"Unknown frame allocation policy: {allocation}")
+        self.page_size = page_size
+        self.total_memory = total_memory
+        self.segment_sizes = segment_sizes
+        self.replacement = replacement
+        self.allocation = allocation
+        self.window = window
+        self.pff_threshold = pff_threshold
+        self.frame_count = total_memory // page_size
+        self.physical_memory = [None] * self.frame_count
+        self.free_frames = list(range(self.frame_count - 1, -1, -1))
+        self.global_lru = OrderedDict()  # (pid, page) in LRU order across all processes
+        self.processes = {}
+        self.page_faults = 0
+        self.page_replacements = 0
+        self.pages_released = 0
+
+    def add_process(self, pid, segment_sizes=None):
+        process = ProcessSpace(pid, self.page_size, self.total_memory, segment_sizes or self.segment_sizes)
+        self.processes[pid] = process
+        return process
+
+    def remove_process(self, pid):
+        process = self.processes.pop(pid)
+        for page in list(process.pages):
+            self.release(process, page)
+
+    def unmap(self, process, page):
+        frame = process.pages.pop(page)[0]
+        del self.global_lru[(process.pid, page)]
+        self.physical_memory[frame] = None
+        return frame
+
+    def release(self, process, page):
+        self.free_frames.append(self.unmap(process, page))
+
+    def evict(self, process, page):
+        # the victim's frame goes straight to the faulting page rather than back to the free list
+        process.page_replacements += 1
+        self.page_replacements += 1
+        return self.unmap(process, page)
+
+    def evict_global_lru(self):
+        pid, page = next(iter(self.global_lru))
+        return self.evict(self.processes[pid], page)
+
+    def evict_local_lru(self, process):
+        return self.evict(process, next(iter(process.pages)))
+
+    def trim_working_set(self, process):
+        oldest = process.clock - self.window
+        pages = process.pages
+        while pages:
+            page, entry = next(iter(pages.items()))
+            if entry[2] > oldest:
+                break
+            self.release(process, page)
+            self.pages_released += 1
+
+    def take_frame(self, process):
+        if self.allocation == 'fixed':
+            quota = max(1, self.frame_count // len(self.processes))
+            if self.replacement == 'local' and process.pages and len(process.pages) >= quota:
+                return self.evict_local_lru(process)
+        elif self.allocation == 'pff':
+            previous_fault, process.last_fault = process.last_fault, process.clock
+            if process.clock - previous_fault > self.pff_threshold:
+                # faulting rarely: shrink to the pages used since the previous fault before taking a frame
+                pages = process.pages
+                while pages:
+                    page, entry = next(iter(pages.items()))
+                    if entry[2] >= previous_fault:
+                        break
+                    self.release(process, page)
+                    self.pages_released += 1
+                if not self.free_frames and process.pages:
+                    return self.evict_local_lru(process)
+            elif not self.free_frames:
+                return self.evict_global_lru()  # faulting often: grow at the expense of the coldest page anywhere
+        if self.free_frames:
+            return self.free_frames.pop()
+        if self.replacement == 'local' and process.pages:
+            return self.evict_local_lru(process)
+        return self.evict_global_lru()
+
+    def access(self, pid, page_number, segment_id):
+        process = self.processes.get(pid)
+        if process is None:
+            process = self.add_process(pid)
+        if segment_id not in process.segment_table:
+            return False
+
+        process.clock += 1
+        entry = process.pages.get(page_number)
+        if entry is not None:
+            entry[2] = process.clock
+            process.pages.move_to_end(page_number)
+            self.global_lru.move_to_end((pid, page_number))
+            if self.allocation == 'working_set':
+                self.trim_working_set(process)
+            return True
+
+        self.page_faults += 1
+        process.page_faults += 1
+        if self.allocation == 'working_set':
+            self.trim_working_set(process)
+        frame = self.take_frame(process)
+        self.physical_memory[frame] = (pid, page_number)
+        process.pages[page_number] = [frame, segment_id, process.clock]
+        self.global_lru[(pid, page_number)] = None
+        return False
+
+    def frame_layout(self):
+        return [None if slot is None else (slot[1], self.processes[slot[0]].pages[slot[1]][1])
+                for slot in self.physical_memory]
+
+class BuddyAllocator:
+    # Binary buddy allocator over [0, total_memory) in blocks of min_block << order. Each order keeps a set
+    # of free block offsets for O(1) buddy checks and a lazily cleaned min-heap so the lowest free address
+    # is handed out first, making allocate and free O(log n). A total_memory that is not a power of two is
+    # split into aligned power-of-two arenas that never merge with each other. Free space and internal
+    # fragmentation are kept as running totals; external fragmentation is the free space outside the
+    # largest free block, i.e. what a request for the largest free block could not use.
+    def __init__(self, total_memory, min_block):
+        if min_block <= 0 or min_block & (min_block - 1):
+            raise ValueError(f"Buddy blocks must be a power of two, got {min_block}")
+        blocks = total_memory // min_block
+        self.min_block = min_block
+        self.max_order = max(blocks.bit_length() - 1, 0)
+        self.free_sets = [set() for _ in range(self.max_order + 1)]
+        self.free_heaps = [[] for _ in range(self.max_order + 1)]
+        self.allocated = {}  # offset -> (order, requested size)
+        self.free_bytes = 0
+        self.internal = 0
+        offset = 0
+        for order in range(self.max_order, -1, -1):
+            if blocks >> order & 1:
+                self.push_free(order, offset)
+                offset += min_block << order
+                self.free_bytes += min_block << order
+
+    def push_free(self, order, offset):
+        self.free_sets[order].add(offset)
+        heapq.heappush(self.free_heaps[order], offset)
+
+    def pop_free(self, order):
+        heap, free = self.free_heaps[order], self.free_sets[order]
+        while True:
+            offset = heapq.heappop(heap)
+            if offset in free:
+                free.remove(offset)
+                return offset
+
+    def order_for(self, size):
+        return max((size - 1) // self.min_block, 0).bit_length()
+
+    def allocate(self, size):
+        # offset of a block holding size bytes, or None when no free block is large enough
+        order = self.order_for(size)
+        found = order
+        while found <= self.max_order and not self.free_sets[found]:
+            found += 1
+        if found > self.max_order:
+            return None
+        offset = self.pop_free(found)
+        while found > order:
+            found -= 1
+            self.push_free(found, offset + (self.min_block << found))
+        self.allocated[offset] = (order, size)
+        self.free_bytes -= self.min_block << order
+        self.internal += (self.min_block << order) - size
+        return offset
+
+    def free(self, offset):
+        order, size = self.allocated.pop(offset)
+        self.free_bytes += self.min_block << order
+        self.internal -= (self.min_block << order) - size
+        while order < self.max_order:
+            buddy = offset ^ (self.min_block << order)
+            if buddy not in self.free_sets[order]:
+                break
+            self.free_sets[order].remove(buddy)  # its heap entry is dropped lazily
+            offset = min(offset, buddy)
+            order += 1
+        self.push_free(order, offset)
+        if len(self.free_heaps[order]) > 2 * len(self.free_sets[order]) + 16:
+            self.free_heaps[order] = sorted(self.free_sets[order])
+
+    def largest_free_block(self):
+        for order in range(self.max_order, -1, -1):
+            if self.free_sets[order]:
+                return self.min_block << order
+        return 0
+
+    def block_size(self, offset):
+        return self.min_block << self.allocated[offset][0]
+
+class DynamicSegmentation:
+    # Runtime segment alloc/free/resize for a MemoryManager or CompactMemoryManager, backed by a
+    # BuddyAllocator of page-sized blocks. The manager's segment_table and fragmentation are kept current
+    # after every event, and a fragmentation sample is appended to `timeline` every `sample_every` events.
+    # Freeing a segment only invalidates it: page numbers are not segment-relative in the page table, so
+    # its resident pages age out through the normal replacement policy.
+    def __init__(self, memory, sample_every=1000):
+        self.memory = memory
+        self.allocator = BuddyAllocator(memory.total_memory, memory.page_size)
+        self.sample_every = sample_every
+        self.events = 0
+        self.references = 0
+        self.failed_allocations = 0
+        self.relocations = 0
+        self.timeline = []
+        initial = [(seg_id, entry['limit']) for seg_id, entry in memory.segment_table.items()]
+        memory.segment_table.clear()
+        for seg_id, size in initial:
+            self.allocate(seg_id, size)
+        self.events = 0
+        self.timeline = []
+
+    def place(self, seg_id, size):
+        base = self.allocator.allocate(size)
+        if base is None:
+            self.failed_allocations += 1
+            return False
+        pages_needed = (size + self.memory.page_size - 1) // self.memory.page_size
+        self.memory.segment_table[seg_id] = {'base': base, 'limit': size, 'pages': pages_needed}
+        return True
+
+    def allocate(self, seg_id, size):
+        if seg_id in self.memory.segment_table:
+            return self.resize(seg_id, size)
+        placed = self.place(seg_id, size)
+        self.record_event()
+        return placed
+
+    def free(self, seg_id):
+        entry = self.memory.segment_table.pop(seg_id, None)
+        if entry is not None:
+            self.allocator.free(entry['base'])
+        self.record_event()
+
+    def resize(self, seg_id, size):
+        entry = self.memory.segment_table.get(seg_id)
+        if entry is None:
+            return self.allocate(seg_id, size)
+        allocator = self.allocator
+        if allocator.order_for(size) == allocator.allocated[entry['base']][0]:
+            # still fits its block: only the internal fragmentation changes
+            allocator.internal += entry['limit'] - size
+            allocator.allocated[entry['base']] = (allocator.allocated[entry['base']][0], size)
+            entry['limit'] = size
+            entry['pages'] = (size + self.memory.page_size - 1) // self.memory.page_size
+            placed = True
+        else:
+            old_size = entry['limit']
+            allocator.free(entry['base'])
+            del self.memory.segment_table[seg_id]
+            placed = self.place(seg_id, size)
+            if placed:
+                self.relocations += 1
+            else:
+                self.place(seg_id, old_size)  # its old block was just freed, so this cannot fail
+        self.record_event()
+        return placed
+
+    def record_event(self):
+        allocator = self.allocator
+        largest = allocator.largest_free_block()
+        self.memory.fragmentation['internal'] = allocator.internal
+        self.memory.fragmentation['external'] = allocator.free_bytes - largest
+        self.events += 1
+        if self.events % self.sample_every == 0:
+            self.timeline.append({
+                'events': self.events,
+                'references': self.references,
+                'segments': len(self.memory.segment_table),
+                'free_bytes': allocator.free_bytes,
+                'largest_free_block': largest,
+                'internal_fragmentation': allocator.internal,
+                'external_fragmentation': allocator.free_bytes - largest,
+            })
+
+    def run(self, trace, algorithm):
+        # trace mixes (page, segment_id) references with ('alloc', seg, size), ('free', seg) and
+        # ('resize', seg, size) events; OPT is not offered because its next-use pass needs a pure reference trace
+        memory = self.memory
+        if algorithm == 'lru':
+            step = memory.lru_page_replacement
+        elif algorithm == 'demand':
+            step = memory.demand_page
+        elif algorithm in REPLACEMENT_POLICIES:
+            memory.use_policy(algorithm)
+            step = memory.policy_page_replacement
+        else:
+            raise ValueError(f"Dynamic segmentation does not support the {algorithm} algorithm")
+        for item in trace:
+            kind = item[0]
+            if kind == 'alloc':
+                self.allocate(item[1], item[2])
+            elif kind == 'free':
+                self.free(item[1])
+            elif kind == 'resize':
+                self.resize(item[1], item[2])
+            else:
+                self.references += 1
+                step(kind, item[1])
+        return memory
+
+    def export(self):
+        allocator = self.allocator
+        return {
+            'events': self.events,
+            'references': self.references,
+            'segments': len(self.memory.segment_table),
+            'failed_allocations': self.failed_allocations,
+            'relocations': self.relocations,
+            'free_bytes': allocator.free_bytes,
+            'largest_free_block': allocator.largest_free_block(),
+            'timeline': self.timeline,
+        }
+
+def compute_next_use(page_sequence):
+    # next_use[i] is the index of the next reference to page_sequence[i], or len(page_sequence) if none
+    never = len(page_sequence)
+    next_use = [never] * never
+    seen = {}
+    for i in range(never - 1, -1, -1):
+        page = page_sequence[i]
+        next_use[i] = seen.get(page, never)
+        seen[page] = i
+    return next_use
+
+def iter_with_next_use(trace, chunk_size=1 << 20, offset=0, progress=None, first_use=None):
+    # Two passes over spooled fixed-width columns: a backward chunked pass fills in next-use indices,
+    # then a forward pass yields (page, segment_id, next_use) without holding the trace in memory.
+    # offset is the index of the first reference when resuming part-way through a trace. progress, if
+    # given, is called as progress(stage, references) after each chunk of the 'reading' and 'indexing'
+    # passes, before anything is yielded; it may raise to abandon the run. first_use, if given, is called
+    # once before the first reference is yielded as first_use(first, never), where first maps each page to
+    # the index of its first reference and never is the index used for "not referenced again".
+    spool_size = chunk_size * 8
+    with tempfile.SpooledTemporaryFile(spool_size) as pages_file, \
+            tempfile.SpooledTemporaryFile(spool_size) as segments_file, \
+            tempfile.SpooledTemporaryFile(spool_size) as next_file:
+        count = 0
+        pages, segments = array('q'), array('q')
+        for page, seg_id in trace:
+            pages.append(page)
+            segments.append(seg_id)
+            if len(pages) >= chunk_size:
+                pages.tofile(pages_file)
+                segments.tofile(segments_file)
+                count += len(pages)
+                pages, segments = array('q'), array('q')
+                if progress is not None:
+                    progress('reading', count)
+        pages.tofile(pages_file)
+        segments.tofile(segments_file)
+        count += len(pages)
+
+        seen = {}
+        end = count
+        while end > 0:
+            start = max(0, end - chunk_size)
+            pages = array('q')
+            pages_file.seek(start * 8)
+            pages.fromfile(pages_file, end - start)
+            next_uses = array('q', pages)
+            for j in range(len(pages) - 1, -1, -1):
+                page = pages[j]
+                next_uses[j] = seen.get(page, offset + count)
+                seen[page] = offset + start + j
+            next_file.seek(start * 8)
+            next_uses.tofile(next_file)
+            end = start
+            if progress is not None:
+                progress('indexing', count - start)
+        if first_use is not None:
+            first_use(seen, offset + count)
+        seen = None
+
+        for f in (pages_file, segments_file, next_file):
+            f.seek(0)
+        for start in range(0, count, chunk_size):
+            n = min(chunk_size, count - start)
+            pages, segments, next_uses = array('q'), array('q'), array('q')
+            pages.fromfile(pages_file, n)
+            segments.fromfile(segments_file, n)
+            next_uses.fromfile(next_file, n)
+            yield from zip(pages, segments, next_uses)
+
+def read_text_trace(path):
+    # one reference per line as "page" or "page,segment" / "page segment"; blank lines and # comments are skipped
+    with open(path) as f:
+        for line in f:
+            fields = line.split('#', 1)[0].replace(',', ' ').split()
+            if not fields:
+                continue
+            yield int(fields[0]), int(fields[1]) if len(fields) > 1 else 0
+
+def read_csv_trace(path):
+    with open(path, newline='') as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip().lstrip('-').isdigit():
+                continue  # header or blank row
+            yield int(row[0]), int(row[1]) if len(row) > 1 and row[1].strip() else 0
+
+BINARY_RECORD = struct.Struct('<II')  # page number, segment id
+
+def read_binary_trace(path, record=BINARY_RECORD, start=0):
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) < record.size * (start + 1):
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                usable = len(view) - len(view) % record.size
+                yield from record.iter_unpack(view[start * record.size:usable])
+            finally:
+                view.release()
+
+SEGMENT_EVENTS = {'alloc': 2, 'free': 1, 'resize': 2}  # event -> number of integer arguments
+
+def read_segment_trace(path):
+    # like read_text_trace, plus "alloc <segment> <size>", "free <segment>" and "resize <segment> <size>" lines
+    with open(path) as f:
+        for line in f:
+            fields = line.split('#', 1)[0].replace(',', ' ').split()
+            if not fields:
+                continue
+            if fields[0] in SEGMENT_EVENTS:
+                yield (fields[0],) + tuple(int(field) for field in fields[1:1 + SEGMENT_EVENTS[fields[0]]])
+            else:
+                yield int(fields[0]), int(fields[1]) if len(fields) > 1 else 0
+
+TRACE_READERS = {'text': read_text_trace, 'csv': read_csv_trace, 'binary': read_binary_trace}
+
+def open_trace(path, trace_format=None):
+    if trace_format is None:
+        if path.endswith('.csv'):
+            trace_format = 'csv'
+        elif path.endswith(('.bin', '.trace')):
+            trace_format = 'binary'
+        else:
+            trace_format = 'text'
+    return TRACE_READERS[trace_format](path)
+
+def write_binary_trace(path, trace, record=BINARY_RECORD):
+    with open(path, 'wb') as f:
+        for page, seg_id in trace:
+            f.write(record.pack(page, seg_id))
+
+ALGORITHMS = ['lru', 'optimal', 'demand'] + list(REPLACEMENT_POLICIES)
+
+def parse_int_list(text):
+    return [int(x) for x in text.split(',')]
+
+def trace_steps(memory, trace, algorithm, offset=0, progress=None, chunk_size=1 << 20):
+    # (method, page, segment_id, *extra) per reference, for drivers that do work between references;
+    # progress and chunk_size go to iter_with_next_use for OPT's next-use pass
+    if algorithm == 'lru':
+        return ((memory.lru_page_replacement, page, seg_id) for page, seg_id in trace)
+    if algorithm == 'optimal':
+        return ((memory.indexed_optimal_page_replacement, page, seg_id, next_use)
+                for page, seg_id, next_use in iter_with_next_use(trace, chunk_size, offset, progress,
+                                                                 memory.seed_next_use))
+    if algorithm == 'demand':
+        return ((memory.demand_page, page, seg_id) for page, seg_id in trace)
+    if algorithm in REPLACEMENT_POLICIES:
+        memory.use_policy(algorithm)
+        return ((memory.policy_page_replacement, page, seg_id) for page, seg_id in trace)
+    raise ValueError(f"Unknown algorithm: {algorithm}")
+
+class Instrumentation:
+    # Opt-in profiling for run_trace. Each reference is timed and attributed to the phase it ended in,
+    # judged from the manager's counters, so MemoryManager itself carries no timing code; a run without
+    # instrumentation pays nothing. The victim search share is the 'evict' mean minus the 'allocate' mean.
+    PHASES = ('segment_check', 'hit', 'allocate', 'evict')
+
+    def __init__(self):
+        self.phase_seconds = dict.fromkeys(self.PHASES, 0.0)
+        self.phase_counts = dict.fromkeys(self.PHASES, 0)
+        self.segment_hits = {}
+        self.segment_misses = {}
+        self.references = 0
+        self.eviction_probes = 0
+        self.elapsed = 0.0
+
+    def run(self, memory, trace, algorithm, offset=0):
+        clock = time.perf_counter
+        phase_seconds, phase_counts = self.phase_seconds, self.phase_counts
+        probes_before = memory.eviction_probes
+        run_start = clock()
+        for step, page, seg_id, *extra in trace_steps(memory, trace, algorithm, offset):
+            faults, replacements = memory.page_faults, memory.page_replacements
+            start = clock()
+            step(page, seg_id, *extra)
+            duration = clock() - start
+            if seg_id not in memory.segment_table:
+                phase = 'segment_check'
+            elif memory.page_replacements != replacements:
+                phase = 'evict'
+            elif memory.page_faults != faults:
+                phase = 'allocate'
+            else:
+                phase = 'hit'
+            phase_seconds[phase] += duration
+            phase_counts[phase] += 1
+            if phase == 'hit':
+                self.segment_hits[seg_id] = self.segment_hits.get(seg_id, 0) + 1
+            elif phase != 'segment_check':
+                self.segment_misses[seg_id] = self.segment_misses.get(seg_id, 0) + 1
+        self.elapsed += clock() - run_start
+        self.references = sum(phase_counts.values())
+        self.eviction_probes += memory.eviction_probes - probes_before
+        return memory
+
+    def export(self):
+        evictions = self.phase_counts['evict']
+        return {
+            'references': self.references,
+            'elapsed_seconds': self.elapsed,
+            'references_per_second': self.references / self.elapsed if self.elapsed else 0.0,
+            'phases': {
+                phase: {
+                    'count': self.phase_counts[phase],
+                    'seconds': self.phase_seconds[phase],
+                    'mean_us': self.phase_seconds[phase] / self.phase_counts[phase] * 1e6 if self.phase_counts[phase] else 0.0,
+                }
+                for phase in self.PHASES
+            },
+            'segments': {
+                seg_id: {'hits': self.segment_hits.get(seg_id, 0), 'misses': self.segment_misses.get(seg_id, 0)}
+                for seg_id in sorted(set(self.segment_hits) | set(self.segment_misses))
+            },
+            'eviction_probes': self.eviction_probes,
+            'probes_per_eviction': self.eviction_probes / evictions if evictions else 0.0,
+        }
+
+class TLB:
+    # Set-associative TLB with LRU within each set; ways == entries makes it fully associative
+    def __init__(self, entries=64, ways=4):
+        if entries <= 0 or ways <= 0 or entries % ways:
+            raise ValueError(f"TLB entries ({entries}) must be a positive multiple of its ways ({ways})")
+        self.ways = ways
+        self.sets = [OrderedDict() for _ in range(entries // ways)]
+
+    def lookup(self, page_number):
+        entries = self.sets[page_number % len(self.sets)]
+        if page_number in entries:
+            entries.move_to_end(page_number)
+            return True
+        return False
+
+    def insert(self, page_number):
+        entries = self.sets[page_number % len(self.sets)]
+        if len(entries) >= self.ways:
+            entries.popitem(last=False)
+        entries[page_number] = None
+
+    def invalidate(self, page_number):
+        self.sets[page_number % len(self.sets)].pop(page_number, None)
+
+class TranslationLayer:
+    # Address translation cost in front of a memory manager. Every valid reference looks its page up in
+    # the TLB; a miss walks a radix page table of `levels` levels, one memory access per level, where each
+    # table holds page_size // pte_size entries. A reference that faults pays fault_cycles on top of its walk.
+    # When a fault replaces a page, the victim's TLB entry is shot down; the victim is whichever page this
+    # layer last saw mapped to the frame the faulting page received. References to unknown segments stop
+    # at the segment table and cost nothing further.
+    def __init__(self, tlb_entries=64, tlb_ways=4, levels=4, pte_size=8, tlb_cycles=1, memory_cycles=100,
+                 fault_cycles=1000000, cycle_ns=1.0):
+        self.tlb = TLB(tlb_entries, tlb_ways)
+        self.levels = levels
+        self.pte_size = pte_size
+        self.tlb_cycles = tlb_cycles
+        self.memory_cycles = memory_cycles
+        self.fault_cycles = fault_cycles
+        self.cycle_ns = cycle_ns
+        self.references = 0
+        self.tlb_hits = 0
+        self.page_walks = 0
+        self.walk_accesses = 0
+        self.page_faults = 0
+        self.segment_faults = 0
+        self.shootdowns = 0
+        self.cycles = 0
+        self.frame_owner = {}  # frame -> page it was last given to in this run
+        self.page_tables = set()  # (level, index prefix) of every page table node touched by a walk
+        self.level_shift = None
+
+    def walk(self, page_number):
+        # level 0 is the root; each level consumes level_shift bits of the page number
+        shift = self.level_shift
+        for level in range(self.levels):
+            self.page_tables.add((level, page_number >> (shift * (self.levels - level))))
+        self.page_walks += 1
+        self.walk_accesses += self.levels
+        return self.levels * self.memory_cycles
+
+    def run(self, memory, trace, algorithm, offset=0):
+        self.level_shift = max(1, (memory.page_size // self.pte_size).bit_length() - 1)
+        tlb = self.tlb
+        segment_table = memory.segment_table
+        for step, page, seg_id, *extra in trace_steps(memory, trace, algorithm, offset):
+            self.references += 1
+            if seg_id not in segment_table:
+                step(page, seg_id, *extra)
+                self.segment_faults += 1
+                continue
+            faults, replacements = memory.page_faults, memory.page_replacements
+            hit = tlb.lookup(page)
+            step(page, seg_id, *extra)
+            cycles = self.tlb_cycles + self.memory_cycles
+            if memory.page_faults != faults:
+                self.page_faults += 1
+                cycles += self.walk(page) + self.fault_cycles
+                frame = memory.lookup_frame(page)
+                victim = self.frame_owner.get(frame)
+                if memory.page_replacements != replacements and victim is not None:
+                    tlb.invalidate(victim)
+                    self.shootdowns += 1
+                self.frame_owner[frame] = page
+                if hit:
+                    tlb.invalidate(page)  # stale entry left by an earlier run on this layer
+                tlb.insert(page)
+            elif hit:
+                self.tlb_hits += 1
+            else:
+                cycles += self.walk(page)
+                tlb.insert(page)
+            self.cycles += cycles
+        return memory
+
+    def export(self):
+        translated = self.references - self.segment_faults
+        effective_cycles = self.cycles / translated if translated else 0.0
+        return {
+            'references': self.references,
+            'tlb_hits': self.tlb_hits,
+            'tlb_hit_rate': self.tlb_hits / translated if translated else 0.0,
+            'page_walks': self.page_walks,
+            'walk_memory_accesses': self.walk_accesses,
+            'page_faults': self.page_faults,
+            'segment_faults': self.segment_faults,
+            'tlb_shootdowns': self.shootdowns,
+            'page_table_pages': len(self.page_tables),
+            'total_cycles': self.cycles,
+            'effective_access_cycles': effective_cycles,
+            'effective_access_ns': effective_cycles * self.cycle_ns,
+        }
+
+def run_trace(memory, trace, algorithm, instrumentation=None, offset=0):
+    # offset is the trace index of the first reference, for runs resumed from a checkpoint
+    if instrumentation is not None:
+        return instrumentation.run(memory, trace, algorithm, offset)
+    if algorithm == 'lru':
+        for page, seg_id in trace:
+            memory.lru_page_replacement(page, seg_id)
+    elif algorithm == 'optimal':
+        for page, seg_id, next_use in iter_with_next_use(trace, offset=offset, first_use=memory.seed_next_use):
+            memory.indexed_optimal_page_replacement(page, seg_id, next_use)
+    elif algorithm == 'demand':
+        for page, seg_id in trace:
+            memory.demand_page(page, seg_id)
+    elif algorithm in REPLACEMENT_POLICIES:
+        memory.use_policy(algorithm)
+        for page, seg_id in trace:
+            memory.policy_page_replacement(page, seg_id)
+    else:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    return memory
+
+def run_with_checkpoints(memory, trace, algorithm, path, every, trace_offset=0):
+    # trace must start at trace_offset; a checkpoint is written every `every` references and at the end
+    references = trace_offset
+    for step, page, seg_id, *extra in trace_steps(memory, trace, algorithm, trace_offset):
+        step(page, seg_id, *extra)
+        references += 1
+        if references % every == 0:
+            save_checkpoint(memory, path, references)
+    save_checkpoint(memory, path, references)
+    return memory
+
+def collect_metrics(memory):
+    return {
+        'page_faults': memory.page_faults,
+        'page_replacements': memory.page_replacements,
+        'internal_fragmentation': memory.fragmentation['internal'],
+        'external_fragmentation': memory.fragmentation['external'],
+        'segment_table': memory.segment_table,
+    }
+
+def make_memory(config):
+    backend = MEMORY_BACKENDS[config.get('backend', 'dict')]
+    return backend(config['page_size'], config['total_memory'], config.get('segment_sizes'))
+
+def simulate(trace, config, algorithm='lru', instrumentation=None):
+    # config['translation'], if given, holds TranslationLayer options and adds a 'translation' section
+    translation = config.get('translation')
+    if config.get('backend') == 'numpy':
+        if instrumentation is not None or translation is not None:
+            raise ValueError("Instrumentation and translation need a per-reference backend, not numpy")
+        return fast_simulate(trace, config, algorithm)
+    memory = make_memory(config)
+    if translation is not None:
+        if instrumentation is not None:
+            raise ValueError("Instrumentation and translation cannot be combined in one run")
+        translation = TranslationLayer(**translation)
+        translation.run(memory, trace, algorithm.lower())
+    else:
+        run_trace(memory, trace, algorithm.lower(), instrumentation)
+    metrics = collect_metrics(memory)
+    if instrumentation is not None:
+        metrics['instrumentation'] = instrumentation.export()
+    if translation is not None:
+        metrics['translation'] = translation.export()
+    return metrics
+
+FAST_ALGORITHMS = ['lru', 'optimal', 'demand', 'fifo']
+
+def trace_arrays(trace, np, record=BINARY_RECORD):
+    # accepts an (N, 2) array, a (pages, segments) pair of arrays, a trace file path or any iterable of pairs;
+    # binary files are mapped as `record`, which must be a pair of same-width integers
+    if isinstance(trace, np.ndarray):
+        return trace[:, 0].astype(np.int64), trace[:, 1].astype(np.int64)
+    if isinstance(trace, tuple) and len(trace) == 2 and isinstance(trace[0], np.ndarray):
+        return np.asarray(trace[0], dtype=np.int64), np.asarray(trace[1], dtype=np.int64)
+    if isinstance(trace, str):
+        size = os.path.getsize(trace)
+        if trace.endswith(('.bin', '.trace')) and size >= record.size:
+            field = np.dtype(record.format[0] + record.format[-1])
+            records = np.memmap(trace, dtype=np.dtype([('page', field), ('segment', field)]), mode='r',
+                                shape=(size // record.size,))
+            return records['page'].astype(np.int64), records['segment'].astype(np.int64)
+        trace = open_trace(trace)
+    flat = np.fromiter(itertools.chain.from_iterable(trace), dtype=np.int64)
+    return flat[0::2], flat[1::2]
+
+def fast_simulate(trace, config, algorithm='lru'):
+    # Batched engine: segment filtering, consecutive-repeat removal and dense page ids are computed with
+    # NumPy, leaving a tight loop over plain int lists for the stateful eviction. OPT keeps every reference,
+    # since one to an unknown segment still refreshes a resident page's next use, and takes its next-use
+    # indices from a stable argsort by page id instead of the spooled backward pass.
+    import numpy as np
+
+    algorithm = algorithm.lower()
+    if algorithm not in FAST_ALGORITHMS:
+        raise ValueError(f"Unknown algorithm for the numpy backend: {algorithm}")
+    memory = MemoryManager(config['page_size'], config['total_memory'], config.get('segment_sizes'))
+    frames = len(memory.physical_memory)
+    pages, segments = trace_arrays(trace, np)
+    if algorithm == 'optimal':
+        # within a page's run of the sorted order each position's successor is that page's next reference
+        ids = np.unique(pages, return_inverse=True)[1].reshape(-1)
+        order = np.argsort(ids, kind='stable')
+        same = ids[order[1:]] == ids[order[:-1]]
+        next_use = np.full(len(pages), len(pages), dtype=np.int64)
+        next_use[order[:-1][same]] = order[1:][same]
+        step = memory.indexed_optimal_page_replacement
+        for page, seg_id, following in zip(pages.tolist(), segments.tolist(), next_use.tolist()):
+            step(page, seg_id, following)
+        return collect_metrics(memory)
+    positions = np.flatnonzero((segments >= 0) & (segments < len(memory.segment_table)))
+    valid_pages = pages[positions]
+    # a repeat of the previous valid reference is always a hit and leaves every policy's state unchanged
+    keep = np.ones(len(valid_pages), dtype=bool)
+    keep[1:] = valid_pages[1:] != valid_pages[:-1]
+    positions = positions[keep]
+
+    faults = replacements = 0
+    ids = np.unique(pages[positions], return_inverse=True)[1].reshape(-1).tolist()
+    # demand paging never refreshes recency on a hit, so it evicts in FIFO order
+    refresh_on_hit = algorithm == 'lru'
+    resident = OrderedDict()
+    move_to_end, popitem = resident.move_to_end, resident.popitem
+    for page in ids:
+        if page in resident:
+            if refresh_on_hit:
+                move_to_end(page)
+            continue
+        faults += 1
+        if len(resident) == frames:
+            popitem(last=False)
+            replacements += 1
+        resident[page] = None
+
+    memory.page_faults = faults
+    memory.page_replacements = replacements
+    return collect_metrics(memory)
+
+def lru_miss_ratio_curve(trace, config=None, max_frames=None):
+    # One pass over the trace: a reference's LRU stack distance is the number of distinct pages touched
+    # since that page's previous access, plus one. A Fenwick tree over access timestamps holds a 1 at each
+    # page's latest access, so that count is a range sum. With f frames a reference faults iff its distance
+    # exceeds f. The tree is grown one node per reference so the trace can be streamed.
+    valid_segments = None
+    if config is not None:
+        valid_segments = range(len(config.get('segment_sizes') or [config['total_memory']]))
+    tree = array('q', [0])  # 1-based
+    last_access = {}
+    histogram = {}
+    references = cold_misses = 0
+
+    def prefix(i):
+        total = 0
+        while i > 0:
+            total += tree[i]
+            i &= i - 1
+        return total
+
+    for page, seg_id in trace:
+        if valid_segments is not None and seg_id not in valid_segments:
+            continue
+        references += 1
+        t = references
+        previous = last_access.get(page)
+        before = prefix(t - 1)
+        if previous is None:
+            cold_misses += 1
+        else:
+            distance = before - prefix(previous) + 1
+            histogram[distance] = histogram.get(distance, 0) + 1
+            i = previous
+            while i < t:
+                tree[i] -= 1
+                i += i & -i
+            before -= 1
+        last_access[page] = t
+        tree.append(1 + before - prefix(t - (t & -t)))
+
+    distinct_pages = len(last_access)
+    if max_frames is None:
+        max_frames = max(distinct_pages, 1)
+    faults = []
+    remaining = references - cold_misses  # reuses whose distance exceeds the frame count
+    for frames in range(1, max_frames + 1):
+        remaining -= histogram.get(frames, 0)
+        faults.append(cold_misses + remaining)
+    frame_counts = list(range(1, max_frames + 1))
+    return {
+        'references': references,
+        'frames': frame_counts,
+        'page_faults': faults,
+        'page_replacements': [fault - min(frames, distinct_pages) for frames, fault in zip(frame_counts, faults)],
+        'miss_ratio': [fault / references if references else 0.0 for fault in faults],
+    }
+
+def plot_miss_ratio_curve(ax, curve):
+    ax.plot(curve['frames'], curve['page_faults'], marker='o' if len(curve['frames']) <= 50 else None)
+    ax.set_title("LRU Miss Ratio Curve")
+    ax.set_xlabel("Frames")
+    ax.set_ylabel("Page Faults")
+
+def save_miss_ratio_plot(curve, path):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    fig, ax = plt.subplots(figsize=(8, 4))
+    plot_miss_ratio_curve(ax, curve)
+    fig.tight_layout()
+    fig.savefig(path)
+    plt.close(fig)
+
+def interleave_traces(traces, quantum=100, schedule='round_robin', seed=0):
+    # Merge per-process traces {pid: iterable of (page, segment_id)} into (pid, page, segment_id) references.
+    # 'round_robin' runs each process for `quantum` references in turn; 'random' picks the next process to
+    # run each quantum with a seeded generator. Either way a step costs O(1) regardless of process count.
+    runnable = [(pid, iter(trace)) for pid, trace in traces.items()]
+    rng = random.Random(seed)
+    turn = 0
+    while runnable:
+        if schedule == 'random':
+            turn = rng.randrange(len(runnable))
+        elif schedule != 'round_robin':
+            raise ValueError(f"Unknown schedule: {schedule}")
+        else:
+            turn %= len(runnable)
+        pid, references = runnable[turn]
+        ran = 0
+        for page, seg_id in references:
+            yield pid, page, seg_id
+            ran += 1
+            if ran == quantum:
+                break
+        if ran < quantum:
+            runnable[turn] = runnable[-1]
+            runnable.pop()
+            if schedule == 'round_robin' and turn < len(runnable):
+                continue  # the process swapped into this slot has not run this round yet
+        turn += 1
+
+def read_process_trace(path):
+    # one reference per line as "pid,page" or "pid,page,segment"; blank lines and # comments are skipped
+    with open(path) as f:
+        for line in f:
+            fields = line.split('#', 1)[0].replace(',', ' ').split()
+            if not fields or not fields[0].lstrip('-').isdigit():
+                continue
+            yield int(fields[0]), int(fields[1]), int(fields[2]) if len(fields) > 2 else 0
+
+def simulate_multiprocess(references, config):
+    # references: (pid, page, segment_id) triples, or a {pid: [(page, segment_id), ...]} dict to interleave
+    if isinstance(references, dict):
+        references = interleave_traces(references, config.get('quantum', 100), config.get('schedule', 'round_robin'),
+                                       config.get('seed', 0))
+    memory = MultiProcessMemoryManager(config['page_size'], config['total_memory'], config.get('segment_sizes'),
+                                       config.get('replacement', 'global'), config.get('allocation', 'fixed'),
+                                       config.get('window', 1000), config.get('pff_threshold', 100))
+    for pid, page, seg_id in references:
+        memory.access(pid, page, seg_id)
+    return {
+        'page_faults': memory.page_faults,
+        'page_replacements': memory.page_replacements,
+        'pages_released': memory.pages_released,
+        'resident_pages': len(memory.global_lru),
+        'processes': {
+            pid: {'page_faults': process.page_faults, 'page_replacements': process.page_replacements,
+                  'resident_pages': len(process.pages)}
+            for pid, process in memory.processes.items()
+        },
+    }
+
+SWEEP_COLUMNS = ['page_size', 'total_memory', 'segment_sizes', 'algorithm', 'backend',
+                 'page_faults', 'page_replacements', 'internal_fragmentation', 'external_fragmentation']
+TRANSLATION_COLUMNS = ['tlb_hit_rate', 'page_walks', 'page_table_pages', 'effective_access_cycles']
+
+SWEEP_RECORD = struct.Struct('<qq')  # signed 64-bit page and segment, for traces the sweep spools itself
+
+def sweep_worker(task):
+    trace_path, record_format, config, algorithm = task
+    record = struct.Struct(record_format)
+    if config.get('backend') == 'numpy':
+        import numpy as np
+        trace = trace_arrays(trace_path, np, record)  # maps the trace file straight into arrays
+    else:
+        trace = read_binary_trace(trace_path, record)
+    metrics = simulate(trace, config, algorithm)
+    segment_sizes = config['segment_sizes'] or [config['total_memory']]
+    row = {'page_size': config['page_size'], 'total_memory': config['total_memory'],
+           'segment_sizes': ','.join(map(str, segment_sizes)), 'algorithm': algorithm,
+           'backend': config.get('backend', 'dict')}
+    row.update((key, metrics[key]) for key in SWEEP_COLUMNS[5:])
+    if 'translation' in metrics:
+        row.update((key, metrics['translation'][key]) for key in TRANSLATION_COLUMNS)
+    return row
+
+def run_sweep(trace, page_sizes, total_memories, segment_layouts=(None,), algorithms=('lru',), backend='dict', workers=None,
+              translation=None):
+    # Every configuration runs in its own process. Workers read the trace from one binary file through
+    # mmap, so the page cache is shared and only the small (path, config, algorithm) task is pickled.
+    configs = [
+        {'page_size': page_size, 'total_memory': total_memory, 'segment_sizes': segment_sizes, 'backend': backend}
+        for page_size, total_memory, segment_sizes in itertools.product(page_sizes, total_memories, segment_layouts)
+    ]
+    if translation is not None:
+        for config in configs:
+            config['translation'] = translation
+    temp_path = None
+    if isinstance(trace, str) and trace.endswith(('.bin', '.trace')):
+        trace_path, record = trace, BINARY_RECORD
+    else:
+        if isinstance(trace, str):
+            trace = open_trace(trace)
+        fd, temp_path = tempfile.mkstemp(suffix='.bin')
+        os.close(fd)
+        # other sources may hold negative or 64-bit page numbers, which '<II' records cannot
+        trace_path, record = temp_path, SWEEP_RECORD
+        try:
+            write_binary_trace(temp_path, trace, record)
+        except struct.error as e:
+            os.remove(temp_path)
+            raise ValueError(f"Trace values do not fit in signed 64-bit records: {e}") from None
+    try:
+        tasks = [(trace_path, record.format, config, algorithm) for config in configs for algorithm in algorithms]
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            return list(pool.map(sweep_worker, tasks))
+    finally:
+        if temp_path:
+            os.remove(temp_path)
+
+def write_table(rows, f):
+    columns = SWEEP_COLUMNS + TRANSLATION_COLUMNS if rows and 'tlb_hit_rate' in rows[0] else SWEEP_COLUMNS
+    writer = csv.DictWriter(f, fieldnames=columns)
+    writer.writeheader()
+    writer.writerows(rows)
+
+BENCHMARK_SIZES = [10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7]
+BENCHMARK_CONFIG = {'page_size': 4096, 'total_memory': 256 * 4096, 'segment_sizes': [128 * 4096, 64 * 4096, 64 * 4096]}
+BENCHMARK_ALGORITHMS = ['lru', 'optimal', 'demand']
+LEGACY_OPTIMAL_MAX_SIZE = 10 ** 3  # optimal_page_replacement slices the trace per reference, O(N^2)
+
+def zipf_weights(count, exponent=1.0):
+    return list(itertools.accumulate(1.0 / (rank ** exponent) for rank in range(1, count + 1)))
+
+def generate_trace(kind, size, seed):
+    # Synthetic (pages, segment ids) columns; the footprint is larger than BENCHMARK_CONFIG's 256 frames
+    rng = random.Random(f"{kind}:{size}:{seed}")
+    footprint = 1024
+    pages, segments = array('q'), array('q', [0]) * size
+    if kind == 'uniform':
+        pages.extend(rng.randrange(footprint) for _ in range(size))
+    elif kind == 'zipf':
+        population = list(range(footprint))
+        rng.shuffle(population)
+        pages.extend(rng.choices(population, cum_weights=zipf_weights(footprint), k=size))
+    elif kind == 'loop':
+        pages.extend(i % 300 for i in range(size))
+    elif kind == 'working_set':
+        # the hot set of 200 pages moves every eighth of the trace, 10% of references go anywhere
+        phase_length = max(1, size // 8)
+        for i in range(size):
+            if rng.random() < 0.1:
+                pages.append(rng.randrange(footprint * 4))
+            else:
+                pages.append((i // phase_length) * 150 + rng.randrange(200))
+    elif kind == 'multi_segment':
+        weights = zipf_weights(footprint // 4)
+        segment_ids = rng.choices([0, 1, 2], weights=[2, 1, 1], k=size)
+        for i, seg_id in enumerate(segment_ids):
+            segments[i] = seg_id
+            pages.append(seg_id * footprint + rng.choices(range(footprint // 4), cum_weights=weights)[0])
+    else:
+        raise ValueError(f"Unknown trace kind: {kind}")
+    return pages, segments
+
+BENCHMARK_TRACES = ['uniform', 'zipf', 'loop', 'working_set', 'multi_segment']
+
+def run_legacy_optimal(memory, pages, segments):
+    page_sequence = pages.tolist()
+    for i, (page, seg_id) in enumerate(zip(page_sequence, segments)):
+        memory.optimal_page_replacement(page, seg_id, page_sequence[i + 1:])
+
+def benchmark_one(pages, segments, algorithm, config, measure_memory):
+    def run():
+        memory = make_memory(config)
+        if algorithm == 'optimal_legacy':
+            run_legacy_optimal(memory, pages, segments)
+        else:
+            run_trace(memory, zip(pages, segments), algorithm)
+        return memory
+
+    # best of several runs for the small traces, where a single run is only a few milliseconds
+    repeat = 5 if len(pages) <= 10 ** 4 else 3 if len(pages) <= 10 ** 5 else 1
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        memory = run()
+        seconds = min(seconds, time.perf_counter() - start)
+    result = {
+        'references': len(pages),
+        'seconds': seconds,
+        'references_per_second': len(pages) / seconds if seconds else 0.0,
+        'page_faults': memory.page_faults,
+        'page_replacements': memory.page_replacements,
+    }
+    if measure_memory:
+        # a second, untimed run: tracemalloc slows allocation down too much to share with the timing
+        memory = None
+        tracemalloc.start()
+        try:
+            run()
+            result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+def run_benchmarks(sizes=BENCHMARK_SIZES, traces=BENCHMARK_TRACES, algorithms=BENCHMARK_ALGORITHMS,
+                   seed=0, config=BENCHMARK_CONFIG, measure_memory=True, progress=None):
+    results = []
+    for kind in traces:
+        for size in sizes:
+            pages, segments = generate_trace(kind, size, seed)
+            names = list(algorithms)
+            if size <= LEGACY_OPTIMAL_MAX_SIZE and 'optimal' in names:
+                names.append('optimal_legacy')
+            for algorithm in names:
+                result = {'trace': kind, 'size': size, 'algorithm': algorithm}
+                result.update(benchmark_one(pages, segments, algorithm, config, measure_memory))
+                results.append(result)
+                if progress:
+                    progress(result)
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'seed': seed,
+        'config': config,
+        'results': results,
+    }
+
+def compare_benchmarks(baseline, current, tolerance=0.2):
+    # entries whose references/second dropped by more than `tolerance` against the baseline report
+    previous = {(r['trace'], r['size'], r['algorithm']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = previous.get((result['trace'], result['size'], result['algorithm']))
+        if old and result['references_per_second'] < old['references_per_second'] * (1 - tolerance):
+            regressions.append({
+                'trace': result['trace'], 'size': result['size'], 'algorithm': result['algorithm'],
+                'baseline': old['references_per_second'], 'current': result['references_per_second'],
+            })
+    return regressions
+
+class MemoryLayoutView:
+    # The layout is a single image artist with one pixel column per frame. Updates write only the changed
+    # columns into the image's own buffer, frame labels are drawn only when zoomed in to a few frames,
+    # and redraws are coalesced to at most one per REDRAW_INTERVAL_MS.
+    LABEL_LIMIT = 64
+    REDRAW_INTERVAL_MS = 100
+
+    def __init__(self, fig, ax, canvas):
+        self.fig = fig
+        self.ax = ax
+        self.canvas = canvas
+        self.widget = canvas.get_tk_widget()
+        # colour code 0 is a free frame, 1 + segment_id % 10 an occupied one
+        self.palette = (np.array([to_rgb('gray')] + [to_rgb(f'C{i}') for i in range(10)]) * 255).astype(np.uint8)
+        self.image = None
+        self.pixels = None
+        self.pages = None
+        self.codes = None
+        self.labels = []
+        self.draw_pending = False
+        self.last_draw = 0.0
+
+    def build(self, frame_count):
+        self.ax.clear()
+        self.pages = np.full(frame_count, FREE_PAGE, dtype=np.int64)
+        self.codes = np.zeros(frame_count, dtype=np.int64)
+        self.image = self.ax.imshow(self.palette[self.codes][np.newaxis], aspect='auto', interpolation='nearest',
+                                    extent=(-0.5, frame_count - 0.5, 0, 1))
+        self.pixels = self.image.get_array()
+        self.labels = []
+        self.ax.set_title("Physical Memory Layout")
+        self.ax.set_xlabel("Frame Number")
+        self.ax.set_yticks([])
+        self.ax.callbacks.connect('xlim_changed', self.update_labels)
+        self.fig.tight_layout()
+
+    def show(self, memory):
+        self.show_snapshot(*memory.frame_snapshot())
+
+    def show_snapshot(self, pages, segments):
+        pages = np.asarray(pages, dtype=np.int64)
+        codes = np.where(pages != FREE_PAGE, 1 + np.asarray(segments, dtype=np.int64) % 10, 0)
+        if self.image is None or self.image.axes is None or len(self.pages) != len(pages):
+            self.build(len(pages))
+        changed = np.flatnonzero((pages != self.pages) | (codes != self.codes))
+        self.update_frames(changed, pages[changed], codes[changed])
+
+    def update_frames(self, frames, pages, codes):
+        if len(frames) == 0:
+            return
+        self.pages[frames] = pages
+        self.codes[frames] = codes
+        self.pixels[0, frames] = self.palette[codes]
+        self.image.changed()
+        self.update_labels()
+        self.request_draw()
+
+    def update_labels(self, ax=None):
+        for label in self.labels:
+            label.remove()
+        self.labels = []
+        low, high = self.ax.get_xlim()
+        first, last = max(0, int(np.ceil(low))), min(len(self.pages) - 1, int(np.floor(high)))
+        if last - first + 1 > self.LABEL_LIMIT:
+            return
+        for frame in range(first, last + 1):
+            if self.pages[frame] != FREE_PAGE:
+                self.labels.append(self.ax.text(frame, 0.5, f'P{self.pages[frame]}', ha='center', va='center',
+                                                color='white', fontsize=8))
+
+    def request_draw(self):
+        if self.draw_pending:
+            return
+        self.draw_pending = True
+        delay = self.REDRAW_INTERVAL_MS - (time.perf_counter() - self.last_draw) * 1000
+        self.widget.after(max(0, int(delay)), self.draw)
+
+    def draw(self):
+        self.draw_pending = False
+        self.last_draw = time.perf_counter()
+        self.canvas.draw_idle()
+
+class SimulationCancelled(Exception):
+    pass
+
+class SimulationWorker(threading.Thread):
+    # Runs one simulation off the Tk thread. Everything it reports goes through `messages`:
+    # ('preparing', stage, references, total) while OPT computes next uses,
+    # ('progress', references, total, faults, replacements, snapshot), then one of ('done', memory),
+    # ('cancelled', references) or ('error', text).
+    CHECK_EVERY = 4096
+    PRECOMPUTE_CHUNK = 1 << 16
+    PROGRESS_INTERVAL = 0.25
+
+    def __init__(self, memory, trace, algorithm, total=None):
+        super().__init__(daemon=True)
+        self.memory = memory
+        self.trace = trace
+        self.algorithm = algorithm
+        self.total = total
+        self.messages = queue.Queue()
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def post_progress(self, references):
+        memory = self.memory
+        self.messages.put(('progress', references, self.total, memory.page_faults, memory.page_replacements,
+                           memory.frame_snapshot()))
+
+    def post_preparing(self, stage, references):
+        # called between chunks of OPT's next-use pass, so Cancel works before the first reference runs
+        if self.cancelled.is_set():
+            raise SimulationCancelled
+        now = time.perf_counter()
+        if now - self.last_progress >= self.PROGRESS_INTERVAL:
+            self.messages.put(('preparing', stage, references, self.total))
+            self.last_progress = now
+
+    def run(self):
+        references = 0
+        self.last_progress = time.perf_counter()
+        try:
+            steps = trace_steps(self.memory, self.trace, self.algorithm, progress=self.post_preparing,
+                                chunk_size=self.PRECOMPUTE_CHUNK)
+            for step, page, seg_id, *extra in steps:
+                step(page, seg_id, *extra)
+                references += 1
+                if references % self.CHECK_EVERY == 0:
+                    if self.cancelled.is_set():
+                        self.messages.put(('cancelled', references))
+                        return
+                    now = time.perf_counter()
+                    if now - self.last_progress >= self.PROGRESS_INTERVAL:
+                        self.post_progress(references)
+                        self.last_progress = now
+        except SimulationCancelled:
+            self.messages.put(('cancelled', references))
+            return
+        except Exception as e:
+            self.messages.put(('error', str(e)))
+            return
+        self.messages.put(('done', self.memory))
+
 class MemorySimulatorApp:
+    POLL_MS = 50
+
     def __init__(self, root):
         self.root = root
         self.root.title("Virtual Memory Management Simulator")
@@ -110,7 +2107,7 @@ class MemorySimulatorApp:
         self.segment_sizes_entry.grid(row=2, column=1, padx=5, pady=5)
 
         ttk.Label(input_frame, text="Algorithm:").grid(row=3, column=0, padx=5, pady=5)
-        self.algorithm_combo = ttk.Combobox(input_frame, values=["LRU", "Optimal"], state="readonly")
+        self.algorithm_combo = ttk.Combobox(input_frame, values=["LRU", "Optimal", "FIFO", "Clock", "LFU", "ARC", "2Q"], state="readonly")
         self.algorithm_combo.set("LRU")
         self.algorithm_combo.grid(row=3, column=1, padx=5, pady=5)
 
@@ -124,8 +2121,19 @@ class MemorySimulatorApp:
         self.segment_ids_entry.insert(0, "0,0,0,1,0,0,2,0,0,1,1,2")
         self.segment_ids_entry.grid(row=5, column=1, padx=5, pady=5)
 
-        ttk.Button(input_frame, text="Run Simulation", command=self.run_simulation).grid(row=6, column=0, padx=5, pady=5)
-        ttk.Button(input_frame, text="Demand Paging", command=self.demand_paging).grid(row=6, column=1, padx=5, pady=5)
+        ttk.Label(input_frame, text="Trace File (optional):").grid(row=6, column=0, padx=5, pady=5)
+        self.trace_file_entry = ttk.Entry(input_frame)
+        self.trace_file_entry.grid(row=6, column=1, padx=5, pady=5)
+
+        self.run_button = ttk.Button(input_frame, text="Run Simulation", command=self.run_simulation)
+        self.run_button.grid(row=7, column=0, padx=5, pady=5)
+        self.demand_button = ttk.Button(input_frame, text="Demand Paging", command=self.demand_paging)
+        self.demand_button.grid(row=7, column=1, padx=5, pady=5)
+        self.mrc_button = ttk.Button(input_frame, text="Miss Ratio Curve", command=self.miss_ratio_curve)
+        self.mrc_button.grid(row=7, column=2, padx=5, pady=5)
+        self.cancel_button = ttk.Button(input_frame, text="Cancel", command=self.cancel_simulation, state="disabled")
+        self.cancel_button.grid(row=7, column=3, padx=5, pady=5)
+        self.worker = None
 
         self.results_frame = ttk.LabelFrame(root, text="Results", padding=10)
         self.results_frame.pack(fill="x", padx=10, pady=5)
@@ -139,52 +2147,119 @@ class MemorySimulatorApp:
         self.fig, self.ax = plt.subplots(figsize=(8, 4))
         self.canvas = FigureCanvasTkAgg(self.fig, master=self.memory_frame)
         self.canvas.get_tk_widget().pack(fill="both", expand=True)
+        self.layout_view = MemoryLayoutView(self.fig, self.ax, self.canvas)
 
     def run_simulation(self):
+        self.start_simulation(self.algorithm_combo.get().lower())
+
+    def demand_paging(self):
+        self.start_simulation('demand')
+
+    def start_simulation(self, algorithm):
+        if self.worker is not None and self.worker.is_alive():
+            return
         try:
             page_size = int(self.page_size_entry.get())
             total_memory = int(self.total_memory_entry.get())  # Fixed: Correct comma and variable name
-            segment_sizes = [int(x) for x in self.segment_sizes_entry.get().split(',')]
-            page_sequence = [int(x) for x in self.page_sequence_entry.get().split(',')]
-            segment_ids = [int(x) for x in self.segment_ids_entry.get().split(',')]
+            segment_sizes = parse_int_list(self.segment_sizes_entry.get())
+            trace_path = self.trace_file_entry.get().strip()
+            if trace_path:
+                trace = open_trace(trace_path)
+                total = os.path.getsize(trace_path) // BINARY_RECORD.size if trace_path.endswith(('.bin', '.trace')) else None
+            else:
+                page_sequence = parse_int_list(self.page_sequence_entry.get())
+                segment_ids = parse_int_list(self.segment_ids_entry.get())
 
-            if len(page_sequence) != len(segment_ids):
-                messagebox.showerror("Error", "Page sequence and segment IDs must have the same length")
-                return
+                if len(page_sequence) != len(segment_ids):
+                    messagebox.showerror("Error", "Page sequence and segment IDs must have the same length")
+                    return
+                trace = list(zip(page_sequence, segment_ids))
+                total = len(trace)
 
             memory = MemoryManager(page_size, total_memory, segment_sizes)
-            algorithm = self.algorithm_combo.get().lower()
+        except (ValueError, OSError) as e:
+            messagebox.showerror("Error", "Invalid input: " + str(e))
+            return
 
-            for i, (page, seg_id) in enumerate(zip(page_sequence, segment_ids)):
-                future_sequence = page_sequence[i + 1:]
-                if algorithm == 'lru':
-                    memory.lru_page_replacement(page, seg_id)
-                else:
-                    memory.optimal_page_replacement(page, seg_id, future_sequence)
+        self.worker = SimulationWorker(memory, trace, algorithm, total)
+        self.set_running(True)
+        self.worker.start()
+        self.root.after(self.POLL_MS, self.poll_worker)
 
-            self.display_results(memory)
-            self.visualize_memory(memory)
-        except ValueError as e:
-            messagebox.showerror("Error", "Invalid input: " + str(e))
+    def cancel_simulation(self):
+        if self.worker is not None:
+            self.worker.cancel()
 
-    def demand_paging(self):
+    def set_running(self, running):
+        self.run_button.config(state="disabled" if running else "normal")
+        self.demand_button.config(state="disabled" if running else "normal")
+        self.mrc_button.config(state="disabled" if running else "normal")
+        self.cancel_button.config(state="normal" if running else "disabled")
+
+    def poll_worker(self):
+        worker = self.worker
+        progress = None
+        while True:
+            try:
+                message = worker.messages.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] in ('progress', 'preparing'):
+                progress = message  # only the latest snapshot is worth drawing
+                continue
+            self.set_running(False)
+            if message[0] == 'done':
+                self.display_results(message[1])
+                self.visualize_memory(message[1])
+            elif message[0] == 'cancelled':
+                self.display_progress(message[1], worker.total, worker.memory.page_faults,
+                                      worker.memory.page_replacements, "Cancelled")
+                self.layout_view.show(worker.memory)
+            else:
+                messagebox.showerror("Error", "Simulation failed: " + message[1])
+            return
+        if progress is not None and progress[0] == 'preparing':
+            _, stage, references, total = progress
+            self.display_progress(references, total, None, None, f"Computing next uses ({stage})")
+        elif progress is not None:
+            _, references, total, faults, replacements, snapshot = progress
+            self.display_progress(references, total, faults, replacements, "Running")
+            self.layout_view.show_snapshot(*snapshot)
+        self.root.after(self.POLL_MS, self.poll_worker)
+
+    def display_progress(self, references, total, faults, replacements, status):
+        self.results_text.delete(1.0, tk.END)
+        done = f"{references}/{total}" if total else f"{references}"
+        text = f"{status}: {done} references\n"
+        if faults is not None:
+            text += f"Page Faults: {faults}\nPage Replacements: {replacements}\n"
+        self.results_text.insert(tk.END, text)
+
+    def miss_ratio_curve(self):
         try:
             page_size = int(self.page_size_entry.get())
-            total_memory = int(self.total_memory_entry.get())  # Fixed: Correct comma and variable name
-            segment_sizes = [int(x) for x in self.segment_sizes_entry.get().split(',')]
-            page_sequence = [int(x) for x in self.page_sequence_entry.get().split(',')]
-            segment_ids = [int(x) for x in self.segment_ids_entry.get().split(',')]
+            total_memory = int(self.total_memory_entry.get())
+            segment_sizes = parse_int_list(self.segment_sizes_entry.get())
+            page_sequence = parse_int_list(self.page_sequence_entry.get())
+            segment_ids = parse_int_list(self.segment_ids_entry.get())
 
             if len(page_sequence) != len(segment_ids):
                 messagebox.showerror("Error", "Page sequence and segment IDs must have the same length")
                 return
 
-            memory = MemoryManager(page_size, total_memory, segment_sizes)
-            for page, seg_id in zip(page_sequence, segment_ids):
-                memory.demand_page(page, seg_id)
+            config = {'page_size': page_size, 'total_memory': total_memory, 'segment_sizes': segment_sizes}
+            curve = lru_miss_ratio_curve(zip(page_sequence, segment_ids), config)
 
-            self.display_results(memory)
-            self.visualize_memory(memory)
+            self.results_text.delete(1.0, tk.END)
+            results = f"References: {curve['references']}\n\nFrames: Page Faults (Miss Ratio)\n"
+            for frames, faults, ratio in zip(curve['frames'], curve['page_faults'], curve['miss_ratio']):
+                results += f"{frames}: {faults} ({ratio:.2%})\n"
+            self.results_text.insert(tk.END, results)
+
+            self.ax.clear()
+            plot_miss_ratio_curve(self.ax, curve)
+            self.fig.tight_layout()
+            self.canvas.draw()
         except ValueError as e:
             messagebox.showerror("Error", "Invalid input: " + str(e))
 
@@ -202,23 +2277,167 @@ class MemorySimulatorApp:
         self.results_text.insert(tk.END, results)
 
     def visualize_memory(self, memory):
-        self.ax.clear()
-        frame_count = len(memory.physical_memory)
-        colors = ['gray' if frame is None else f'C{memory.page_table[frame]["segment_id"] % 10}' for frame in memory.physical_memory]
-        labels = [f'P{frame}' if frame is not None else '' for frame in memory.physical_memory]
+        self.layout_view.show(memory)
 
-        self.ax.bar(range(frame_count), [1] * frame_count, color=colors, edgecolor='black')
-        for i, label in enumerate(labels):
-            if label:
-                self.ax.text(i, 0.5, label, ha='center', va='center', color='white', fontsize=8)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Virtual Memory Management Simulator")
+    parser.add_argument('--headless', action='store_true',
+                        help="run without the GUI and print metrics as JSON; implied by the batch options")
+    parser.add_argument('--page-size', type=int, default=4096)
+    parser.add_argument('--total-memory', type=int, default=16384)
+    parser.add_argument('--segment-sizes', type=parse_int_list, default=[8192, 4096, 4096])
+    parser.add_argument('--algorithm', choices=ALGORITHMS, default='lru')
+    parser.add_argument('--backend', choices=sorted(MEMORY_BACKENDS) + ['numpy'], default='dict')
+    parser.add_argument('--pages', type=parse_int_list, default=[1, 2, 3, 4, 1, 2, 5, 1, 2, 3, 4, 5])
+    parser.add_argument('--segments', type=parse_int_list, default=[0, 0, 0, 1, 0, 0, 2, 0, 0, 1, 1, 2])
+    parser.add_argument('--trace', help="read (page, segment) references from a text, CSV or binary trace file")
+    parser.add_argument('--trace-format', choices=sorted(TRACE_READERS))
+    parser.add_argument('--sweep-page-sizes', type=parse_int_list, help="sweep these page sizes and print a CSV table")
+    parser.add_argument('--sweep-total-memories', type=parse_int_list)
+    parser.add_argument('--sweep-segment-sizes', type=parse_int_list, action='append', help="may be given more than once")
+    parser.add_argument('--sweep-algorithms', type=lambda text: text.split(','))
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--instrument', action='store_true', help="add per-phase timings and per-segment hit counts")
+    parser.add_argument('--mrc', action='store_true', help="print the LRU miss ratio curve for every frame count")
+    parser.add_argument('--max-frames', type=int)
+    parser.add_argument('--plot', help="with --mrc, also save the curve as an image")
+    parser.add_argument('--benchmark', metavar='OUTPUT', help="run the benchmark suite and save the results as JSON")
+    parser.add_argument('--benchmark-sizes', type=parse_int_list, default=BENCHMARK_SIZES)
+    parser.add_argument('--benchmark-traces', type=lambda text: text.split(','), default=BENCHMARK_TRACES)
+    parser.add_argument('--benchmark-seed', type=int, default=0)
+    parser.add_argument('--benchmark-baseline', help="earlier benchmark JSON to check for regressions")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc peak memory runs")
+    parser.add_argument('--checkpoint', help="save the simulation state to this file periodically and at the end")
+    parser.add_argument('--checkpoint-every', type=int, default=1000000)
+    parser.add_argument('--resume', help="continue from a checkpoint, skipping the references it already covers")
+    parser.add_argument('--tlb', action='store_true', help="model TLB and page-walk cost and report effective access time")
+    parser.add_argument('--tlb-entries', type=int, default=64)
+    parser.add_argument('--tlb-ways', type=int, default=4)
+    parser.add_argument('--page-table-levels', type=int, default=4)
+    parser.add_argument('--memory-cycles', type=int, default=100, help="cost of one memory access, in cycles")
+    parser.add_argument('--fault-cycles', type=int, default=1000000, help="cost of servicing a page fault, in cycles")
+    parser.add_argument('--cycle-ns', type=float, default=1.0)
+    parser.add_argument('--dynamic-segments', action='store_true',
+                        help="buddy-allocate segments at runtime; the text --trace may contain alloc/free/resize lines")
+    parser.add_argument('--sample-every', type=int, default=1000, help="segment events between fragmentation samples")
+    parser.add_argument('--process-trace', help="multi-process run over a file of pid,page[,segment] references")
+    parser.add_argument('--replacement', choices=MULTIPROCESS_REPLACEMENT, default='global')
+    parser.add_argument('--allocation', choices=MULTIPROCESS_ALLOCATION, default='fixed')
+    parser.add_argument('--window', type=int, default=1000, help="working-set window, in references of a process")
+    parser.add_argument('--pff-threshold', type=int, default=100)
+    args = parser.parse_args(argv)
 
-        self.ax.set_title("Physical Memory Layout")
-        self.ax.set_xlabel("Frame Number")
-        self.ax.set_yticks([])
-        self.fig.tight_layout()
-        self.canvas.draw()
+    if args.benchmark:
+        def progress(result):
+            print(f"{result['trace']:>14} {result['size']:>9} {result['algorithm']:>15} "
+                  f"{result['references_per_second']:>12.0f} refs/s", file=sys.stderr)
+
+        report = run_benchmarks(args.benchmark_sizes, args.benchmark_traces, seed=args.benchmark_seed,
+                                measure_memory=not args.no_memory, progress=progress)
+        with open(args.benchmark, 'w') as f:
+            json.dump(report, f, indent=2)
+        if args.benchmark_baseline:
+            with open(args.benchmark_baseline) as f:
+                regressions = compare_benchmarks(json.load(f), report)
+            for regression in regressions:
+                print(f"Regression: {regression['trace']} {regression['size']} {regression['algorithm']}: "
+                      f"{regression['baseline']:.0f} -> {regression['current']:.0f} refs/s", file=sys.stderr)
+            if regressions:
+                sys.exit(1)
+        return
+
+    # any batch option means a headless run, as --benchmark already does
+    batch_options = (args.sweep_page_sizes, args.sweep_total_memories, args.sweep_segment_sizes, args.sweep_algorithms,
+                     args.instrument, args.mrc, args.checkpoint, args.resume, args.tlb, args.dynamic_segments,
+                     args.process_trace)
+    if not args.headless and not any(batch_options):
+        import_gui()
+        root = tk.Tk()
+        app = MemorySimulatorApp(root)
+        root.mainloop()
+        return
+
+    if args.process_trace:
+        config = {'page_size': args.page_size, 'total_memory': args.total_memory, 'segment_sizes': args.segment_sizes,
+                  'replacement': args.replacement, 'allocation': args.allocation, 'window': args.window,
+                  'pff_threshold': args.pff_threshold}
+        print(json.dumps(simulate_multiprocess(read_process_trace(args.process_trace), config), indent=2))
+        return
+
+    if args.dynamic_segments:
+        if args.backend == 'numpy' or args.algorithm == 'optimal':
+            parser.error("--dynamic-segments needs a per-reference backend and a non-optimal algorithm")
+        memory = make_memory({'page_size': args.page_size, 'total_memory': args.total_memory,
+                              'segment_sizes': args.segment_sizes, 'backend': args.backend})
+        segmentation = DynamicSegmentation(memory, args.sample_every)
+        trace = read_segment_trace(args.trace) if args.trace else zip(args.pages, args.segments)
+        segmentation.run(trace, args.algorithm)
+        metrics = collect_metrics(memory)
+        metrics['segmentation'] = segmentation.export()
+        print(json.dumps(metrics, indent=2))
+        return
+
+    if args.trace:
+        trace = open_trace(args.trace, args.trace_format)
+    elif len(args.pages) != len(args.segments):
+        parser.error("Page sequence and segment IDs must have the same length")
+    else:
+        trace = zip(args.pages, args.segments)
+    if args.mrc:
+        config = {'page_size': args.page_size, 'total_memory': args.total_memory, 'segment_sizes': args.segment_sizes}
+        curve = lru_miss_ratio_curve(trace, config, args.max_frames)
+        if args.plot:
+            save_miss_ratio_plot(curve, args.plot)
+        print(json.dumps(curve))
+        return
+
+    translation = None
+    if args.tlb:
+        if args.backend == 'numpy' or args.instrument:
+            parser.error("--tlb needs a per-reference backend, not numpy, and cannot be combined with --instrument")
+        translation = {'tlb_entries': args.tlb_entries, 'tlb_ways': args.tlb_ways, 'levels': args.page_table_levels,
+                       'memory_cycles': args.memory_cycles, 'fault_cycles': args.fault_cycles,
+                       'cycle_ns': args.cycle_ns}
+
+    sweep_options = (args.sweep_page_sizes, args.sweep_total_memories, args.sweep_segment_sizes, args.sweep_algorithms)
+    if any(option is not None for option in sweep_options):
+        algorithms = args.sweep_algorithms or [args.algorithm]
+        for algorithm in algorithms:
+            if algorithm not in ALGORITHMS:
+                parser.error(f"Unknown algorithm: {algorithm}")
+        rows = run_sweep(args.trace if args.trace and not args.trace_format else trace,
+                         args.sweep_page_sizes or [args.page_size],
+                         args.sweep_total_memories or [args.total_memory],
+                         args.sweep_segment_sizes or [args.segment_sizes],
+                         algorithms, args.backend, args.workers, translation)
+        write_table(rows, sys.stdout)
+        return
+
+    if args.resume or args.checkpoint:
+        if args.backend == 'numpy':
+            parser.error("Checkpoints need a per-reference backend, not numpy")
+        offset = 0
+        if args.resume:
+            memory, offset = load_checkpoint(args.resume)
+            if args.trace and (args.trace_format == 'binary' or
+                               (args.trace_format is None and args.trace.endswith(('.bin', '.trace')))):
+                trace = read_binary_trace(args.trace, start=offset)
+            else:
+                trace = itertools.islice(trace, offset, None)
+        else:
+            memory = make_memory({'page_size': args.page_size, 'total_memory': args.total_memory,
+                                  'segment_sizes': args.segment_sizes, 'backend': args.backend})
+        if args.checkpoint:
+            run_with_checkpoints(memory, trace, args.algorithm, args.checkpoint, args.checkpoint_every, offset)
+        else:
+            run_trace(memory, trace, args.algorithm, offset=offset)
+        print(json.dumps(collect_metrics(memory), indent=2))
+        return
+
+    config = {'page_size': args.page_size, 'total_memory': args.total_memory, 'segment_sizes': args.segment_sizes,
+              'backend': args.backend, 'translation': translation}
+    metrics = simulate(trace, config, args.algorithm, Instrumentation() if args.instrument else None)
+    print(json.dumps(metrics, indent=2))
 
 if __name__ == "__main__":
-    root = tk.Tk()
-    app = MemorySimulatorApp(root)
-    root.mainloop()
+    main()
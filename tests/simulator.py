@@ -0,0 +1,17 @@
+import importlib.util
+import sys
+from pathlib import Path
+
+SOURCE = Path(__file__).resolve().parent.parent / "Total code.py"
+
+
+def load_simulator():
+    # the module's file name has a space in it, so it cannot be imported by name
+    spec = importlib.util.spec_from_file_location("total_code", SOURCE)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module  # sweep workers unpickle their task function by module name
+    spec.loader.exec_module(module)
+    return module
+
+
+sim = load_simulator()
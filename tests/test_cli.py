@@ -0,0 +1,29 @@
+import json
+
+import pytest
+
+from simulator import sim
+
+BATCH_ARGUMENTS = [
+    ['--mrc'],
+    ['--instrument'],
+    ['--tlb'],
+    ['--dynamic-segments'],
+    ['--sweep-page-sizes', '4096', '--workers', '1'],
+    ['--checkpoint', '{tmp}/run.ckpt'],
+]
+
+
+@pytest.mark.parametrize('arguments', BATCH_ARGUMENTS)
+def test_batch_options_run_without_the_gui(monkeypatch, tmp_path, capsys, arguments):
+    monkeypatch.setattr(sim, 'import_gui', lambda: pytest.fail("the GUI was started for a batch run"))
+    sim.main([argument.format(tmp=tmp_path) for argument in arguments])
+    assert capsys.readouterr().out.strip()
+
+
+def test_process_trace_runs_without_the_gui(monkeypatch, tmp_path, capsys):
+    monkeypatch.setattr(sim, 'import_gui', lambda: pytest.fail("the GUI was started for a batch run"))
+    trace = tmp_path / 'processes.txt'
+    trace.write_text("1,3\n2,4,0\n1,3\n")
+    sim.main(['--process-trace', str(trace)])
+    assert json.loads(capsys.readouterr().out)['page_faults'] == 2
@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from simulator import sim
+
+CONFIG = {'page_size': 16, 'total_memory': 16 * 8, 'segment_sizes': [16 * 4, 16 * 4]}
+
+
+def random_trace(seed, length=2000):
+    # a hot set, a cold tail and some references to a segment the config does not define
+    rng = random.Random(seed)
+    trace = []
+    for _ in range(length):
+        page = rng.randrange(6) if rng.random() < 0.7 else rng.randrange(-3, 40)
+        trace.append((page, rng.randrange(3)))
+    return trace
+
+
+def reference_lru(pages, frames):
+    resident = []  # least recently used first
+    faults = replacements = 0
+    for page in pages:
+        if page in resident:
+            resident.remove(page)
+        else:
+            faults += 1
+            if len(resident) == frames:
+                resident.pop(0)
+                replacements += 1
+        resident.append(page)
+    return faults, replacements
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_curve_matches_an_lru_run_at_every_frame_count(seed):
+    trace = random_trace(seed)
+    pages = [page for page, seg_id in trace if seg_id < len(CONFIG['segment_sizes'])]
+    curve = sim.lru_miss_ratio_curve(trace, CONFIG, max_frames=50)
+    assert curve['references'] == len(pages)
+    assert curve['frames'] == list(range(1, 51))
+    for frames, faults, replacements, ratio in zip(curve['frames'], curve['page_faults'],
+                                                   curve['page_replacements'], curve['miss_ratio']):
+        assert (faults, replacements) == reference_lru(pages, frames)
+        assert ratio == faults / len(pages)
+
+
+def test_curve_without_config_keeps_every_reference():
+    trace = random_trace(7)
+    curve = sim.lru_miss_ratio_curve(trace)
+    pages = [page for page, _ in trace]
+    assert curve['frames'][-1] == len(set(pages))
+    assert list(zip(curve['page_faults'], curve['page_replacements'])) == \
+        [reference_lru(pages, frames) for frames in curve['frames']]
+    assert curve['page_faults'][-1] == len(set(pages))
+
+
+def test_curve_of_an_empty_trace():
+    curve = sim.lru_miss_ratio_curve([], CONFIG, max_frames=3)
+    assert curve['references'] == 0
+    assert curve['page_faults'] == [0, 0, 0]
+    assert curve['miss_ratio'] == [0.0, 0.0, 0.0]
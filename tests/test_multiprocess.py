@@ -0,0 +1,132 @@
+import random
+
+import pytest
+
+from simulator import sim
+
+PAGE_SIZE = 16
+
+
+def make_memory(frames, **options):
+    return sim.MultiProcessMemoryManager(PAGE_SIZE, PAGE_SIZE * frames, None, **options)
+
+
+def random_references(seed, processes=3, length=3000):
+    rng = random.Random(seed)
+    return [(pid, rng.randrange(12) if rng.random() < 0.7 else rng.randrange(40), 0)
+            for pid in (rng.randrange(processes) for _ in range(length))]
+
+
+def reference_global_lru(references, frames):
+    resident = []  # (pid, page), least recently used first
+    faults = replacements = 0
+    for pid, page, _ in references:
+        key = (pid, page)
+        if key in resident:
+            resident.remove(key)
+        else:
+            faults += 1
+            if len(resident) == frames:
+                resident.pop(0)
+                replacements += 1
+        resident.append(key)
+    return faults, replacements
+
+
+def reference_local_fixed(references, frames):
+    # every process gets frames // (processes seen so far) and replaces within that share once it holds it
+    resident = []  # (pid, page), least recently used first
+    seen = []
+    faults = replacements = 0
+    for pid, page, _ in references:
+        if pid not in seen:
+            seen.append(pid)
+        key = (pid, page)
+        if key in resident:
+            resident.remove(key)
+            resident.append(key)
+            continue
+        faults += 1
+        own = [k for k in resident if k[0] == pid]
+        quota = max(1, frames // len(seen))
+        if own and (len(own) >= quota or len(resident) == frames):
+            resident.remove(own[0])
+            replacements += 1
+        elif len(resident) == frames:
+            resident.pop(0)
+            replacements += 1
+        resident.append(key)
+    return faults, replacements
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_single_process_matches_memory_manager_lru(seed):
+    trace = [(page, 0) for _, page, _ in random_references(seed, processes=1)]
+    expected = sim.simulate(trace, {'page_size': PAGE_SIZE, 'total_memory': PAGE_SIZE * 10, 'segment_sizes': None})
+    memory = make_memory(10)
+    for page, seg_id in trace:
+        memory.access(7, page, seg_id)
+    assert (memory.page_faults, memory.page_replacements) == (expected['page_faults'], expected['page_replacements'])
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_global_fixed_matches_reference(seed):
+    references = random_references(seed)
+    memory = make_memory(16)
+    for reference in references:
+        memory.access(*reference)
+    assert (memory.page_faults, memory.page_replacements) == reference_global_lru(references, 16)
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_local_fixed_matches_reference(seed):
+    references = random_references(seed)
+    memory = make_memory(16, replacement='local')
+    for reference in references:
+        memory.access(*reference)
+    assert (memory.page_faults, memory.page_replacements) == reference_local_fixed(references, 16)
+
+
+@pytest.mark.parametrize('window', [1, 5, 30])
+def test_working_set_keeps_pages_from_the_last_window(window):
+    references = random_references(4)
+    memory = make_memory(500, allocation='working_set', window=window)
+    history = {}
+    for pid, page, seg_id in references:
+        memory.access(pid, page, seg_id)
+        history.setdefault(pid, []).append(page)
+        assert set(memory.processes[pid].pages) == set(history[pid][-window:])
+
+
+def test_pff_grows_a_faulting_process_and_shrinks_an_idle_one():
+    memory = make_memory(4, allocation='pff', pff_threshold=3)
+    for page in (100, 101, 102):
+        memory.access(2, page, 0)
+    memory.access(1, 0, 0)
+    for _ in range(5):
+        memory.access(1, 0, 0)  # memory is full and process 1 has been idle past the threshold
+
+    # faulting on every reference: after its first, rare fault process 1 keeps taking frames from process 2
+    for page in range(1, 11):
+        memory.access(1, page, 0)
+        assert memory.processes[1].last_fault == memory.processes[1].clock
+    assert len(memory.processes[1].pages) == 4
+    assert not memory.processes[2].pages
+
+    # a long run of hits drops the fault rate below the threshold, so the next fault releases
+    # every page not used since the previous fault
+    for _ in range(10):
+        memory.access(1, 10, 0)
+    released = memory.pages_released
+    memory.access(1, 50, 0)
+    assert set(memory.processes[1].pages) == {10, 50}
+    assert memory.pages_released == released + 3
+
+
+@pytest.mark.parametrize('schedule', ['round_robin', 'random'])
+def test_interleave_runs_every_reference_once_in_per_process_order(schedule):
+    traces = {pid: [(pid * 100 + i, 0) for i in range(length)] for pid, length in [(1, 7), (2, 250), (3, 31)]}
+    merged = list(sim.interleave_traces(traces, quantum=10, schedule=schedule, seed=3))
+    assert len(merged) == sum(len(trace) for trace in traces.values())
+    for pid, trace in traces.items():
+        assert [(page, seg_id) for owner, page, seg_id in merged if owner == pid] == trace
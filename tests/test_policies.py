@@ -0,0 +1,187 @@
+import random
+
+import pytest
+
+from simulator import sim
+
+PAGE_SIZE = 16
+
+
+def random_trace(seed, length=4000):
+    # a drifting hot set with occasional scans, so recency and frequency disagree
+    rng = random.Random(seed)
+    trace = []
+    for i in range(length):
+        if rng.random() < 0.1:
+            page = 100 + rng.randrange(40)
+        else:
+            page = (i // 500) * 3 + rng.randrange(10)
+        trace.append((page, 0))
+    return trace
+
+
+def reference_fifo(pages, frames):
+    resident = []
+    faults = replacements = 0
+    for page in pages:
+        if page in resident:
+            continue
+        faults += 1
+        if len(resident) == frames:
+            resident.pop(0)
+            replacements += 1
+        resident.append(page)
+    return faults, replacements
+
+
+def reference_clock(pages, frames):
+    # second chance over a circular buffer; a newly loaded page starts with its reference bit clear
+    slots, bits = [], []
+    hand = faults = replacements = 0
+    for page in pages:
+        if page in slots:
+            bits[slots.index(page)] = 1
+            continue
+        faults += 1
+        if len(slots) < frames:
+            slots.append(page)
+            bits.append(0)
+            continue
+        while bits[hand]:
+            bits[hand] = 0
+            hand = (hand + 1) % frames
+        slots[hand], bits[hand] = page, 0
+        hand = (hand + 1) % frames
+        replacements += 1
+    return faults, replacements
+
+
+def reference_lfu(pages, frames):
+    # evict the lowest count; among equal counts, the page that reached that count first
+    count, reached = {}, {}
+    faults = replacements = 0
+    for time, page in enumerate(pages):
+        if page in count:
+            count[page] += 1
+            reached[page] = time
+            continue
+        faults += 1
+        if len(count) == frames:
+            victim = min(count, key=lambda p: (count[p], reached[p]))
+            del count[victim], reached[victim]
+            replacements += 1
+        count[page], reached[page] = 1, time
+    return faults, replacements
+
+
+def reference_arc(pages, c):
+    # Megiddo & Modha, "ARC: A Self-Tuning, Low Overhead Replacement Cache", Fig. 4, with the
+    # adaptation steps rounded down to whole pages
+    t1, t2, b1, b2 = [], [], [], []  # LRU end first
+    p = 0
+    faults = replacements = 0
+
+    def replace(x):
+        nonlocal replacements
+        replacements += 1
+        if t1 and (len(t1) > p or (x in b2 and len(t1) == p)):
+            b1.append(t1.pop(0))
+        else:
+            b2.append(t2.pop(0))
+
+    for x in pages:
+        if x in t1 or x in t2:
+            (t1 if x in t1 else t2).remove(x)
+            t2.append(x)
+            continue
+        faults += 1
+        if x in b1:
+            p = min(c, p + max(len(b2) // len(b1), 1))
+            replace(x)
+            b1.remove(x)
+            t2.append(x)
+        elif x in b2:
+            p = max(0, p - max(len(b1) // len(b2), 1))
+            replace(x)
+            b2.remove(x)
+            t2.append(x)
+        else:
+            if len(t1) + len(b1) == c:
+                if len(t1) < c:
+                    b1.pop(0)
+                    replace(x)
+                else:
+                    t1.pop(0)
+                    replacements += 1
+            elif len(t1) + len(t2) + len(b1) + len(b2) >= c:
+                if len(t1) + len(t2) + len(b1) + len(b2) == 2 * c:
+                    b2.pop(0)
+                replace(x)
+            t1.append(x)
+    return faults, replacements
+
+
+def reference_2q(pages, frames):
+    # Johnson & Shasha, full 2Q with Kin = frames / 4 and Kout = frames / 2; when Am is empty the
+    # page comes from A1in whatever its size
+    k_in, k_out = max(1, frames // 4), max(1, frames // 2)
+    a1_in, a1_out, am = [], [], []  # oldest first
+    faults = replacements = 0
+    for x in pages:
+        if x in am:
+            am.remove(x)
+            am.append(x)
+            continue
+        if x in a1_in:
+            continue
+        faults += 1
+        if len(a1_in) + len(am) == frames:
+            replacements += 1
+            if len(a1_in) > k_in or not am:
+                a1_out.append(a1_in.pop(0))
+                if len(a1_out) > k_out:
+                    a1_out.pop(0)
+            else:
+                am.pop(0)
+        if x in a1_out:
+            a1_out.remove(x)
+            am.append(x)
+        else:
+            a1_in.append(x)
+    return faults, replacements
+
+
+REFERENCES = {'fifo': reference_fifo, 'clock': reference_clock, 'lfu': reference_lfu, 'arc': reference_arc,
+              '2q': reference_2q}
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('frames', [1, 4, 13])
+@pytest.mark.parametrize('backend', sim.CHECKPOINT_BACKENDS)
+@pytest.mark.parametrize('policy', sorted(REFERENCES))
+def test_policy_matches_reference_model(policy, backend, frames, seed):
+    trace = random_trace(seed)
+    config = {'page_size': PAGE_SIZE, 'total_memory': PAGE_SIZE * frames, 'segment_sizes': None, 'backend': backend}
+    metrics = sim.simulate(trace, config, policy)
+    expected = REFERENCES[policy]([page for page, _ in trace], frames)
+    assert (metrics['page_faults'], metrics['page_replacements']) == expected
+
+
+def page_stamps(memory):
+    if isinstance(memory, sim.MemoryManager):
+        return sorted((page, entry['last_used']) for page, entry in memory.page_table.items())
+    return sorted((memory.frame_page[frame], memory.frame_stamp[frame])
+                  for frame in range(memory.frame_count) if memory.frame_page[frame] != sim.FREE_PAGE)
+
+
+@pytest.mark.parametrize('policy', sorted(REFERENCES))
+def test_policy_recency_stamps_match_across_backends(policy):
+    # checkpoints save these stamps, so both backends must produce the same ones
+    trace = random_trace(0, length=500)
+    states = []
+    for backend in sim.CHECKPOINT_BACKENDS:
+        memory = sim.make_memory({'page_size': PAGE_SIZE, 'total_memory': PAGE_SIZE * 8, 'segment_sizes': None,
+                                  'backend': backend})
+        sim.run_trace(memory, trace, policy)
+        states.append((memory.clock, page_stamps(memory)))
+    assert states[0] == states[1]
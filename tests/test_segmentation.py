@@ -0,0 +1,142 @@
+import random
+
+import pytest
+
+from simulator import sim
+
+MIN_BLOCK = 16
+
+
+class ReferenceBuddy:
+    # free blocks as a plain set of (offset, size) within explicit power-of-two arenas; the smallest block
+    # that fits is split, lowest address first, and a freed block merges while its buddy in the arena is free
+    def __init__(self, total_memory):
+        self.arenas = []
+        start, blocks = 0, total_memory // MIN_BLOCK
+        for order in range(blocks.bit_length() - 1, -1, -1):
+            if blocks >> order & 1:
+                self.arenas.append((start, MIN_BLOCK << order))
+                start += MIN_BLOCK << order
+        self.free = set(self.arenas)
+        self.allocated = {}  # offset -> (block size, requested size)
+
+    def arena(self, offset):
+        return next(arena for arena in self.arenas if arena[0] <= offset < arena[0] + arena[1])
+
+    def allocate(self, size):
+        block = MIN_BLOCK
+        while block < size:
+            block *= 2
+        candidates = [free for free in self.free if free[1] >= block]
+        if not candidates:
+            return None
+        offset, found = min(candidates, key=lambda free: (free[1], free[0]))
+        self.free.remove((offset, found))
+        while found > block:
+            found //= 2
+            self.free.add((offset + found, found))
+        self.allocated[offset] = (block, size)
+        return offset
+
+    def release(self, offset):
+        block, _ = self.allocated.pop(offset)
+        start, arena_size = self.arena(offset)
+        while block < arena_size:
+            buddy = start + ((offset - start) ^ block)
+            if (buddy, block) not in self.free:
+                break
+            self.free.remove((buddy, block))
+            offset = min(offset, buddy)
+            block *= 2
+        self.free.add((offset, block))
+
+    def free_bytes(self):
+        return sum(size for _, size in self.free)
+
+    def internal(self):
+        return sum(block - size for block, size in self.allocated.values())
+
+    def largest(self):
+        return max((size for _, size in self.free), default=0)
+
+
+def check_invariants(allocator, total_memory):
+    # free and allocated blocks tile the managed space exactly, each aligned within its arena,
+    # and no two free buddies are left unmerged
+    blocks = [(offset, MIN_BLOCK << order, True) for order, free in enumerate(allocator.free_sets) for offset in free]
+    blocks += [(offset, allocator.block_size(offset), False) for offset in allocator.allocated]
+    blocks.sort()
+    end = 0
+    for offset, size, _ in blocks:
+        assert offset == end
+        end += size
+    assert end == total_memory // MIN_BLOCK * MIN_BLOCK
+    reference = ReferenceBuddy(total_memory)
+    for offset, size, is_free in blocks:
+        start, arena_size = reference.arena(offset)
+        assert offset + size <= start + arena_size
+        assert (offset - start) % size == 0
+        if is_free and size < arena_size:
+            buddy = start + ((offset - start) ^ size)
+            assert (buddy, size, True) not in blocks
+    assert allocator.free_bytes == sum(size for _, size, is_free in blocks if is_free)
+
+
+@pytest.mark.parametrize('total_memory', [MIN_BLOCK * 64, MIN_BLOCK * 100, MIN_BLOCK * 37 + 5])
+@pytest.mark.parametrize('seed', range(3))
+def test_allocator_matches_reference(total_memory, seed):
+    rng = random.Random(seed)
+    allocator = sim.BuddyAllocator(total_memory, MIN_BLOCK)
+    reference = ReferenceBuddy(total_memory)
+    live = []
+    for _ in range(1500):
+        if live and rng.random() < 0.45:
+            offset = live.pop(rng.randrange(len(live)))
+            allocator.free(offset)
+            reference.release(offset)
+        else:
+            size = rng.choice([1, MIN_BLOCK, rng.randrange(1, MIN_BLOCK * 20)])
+            offset = allocator.allocate(size)
+            assert offset == reference.allocate(size)
+            if offset is not None:
+                live.append(offset)
+        assert allocator.free_bytes == reference.free_bytes()
+        assert allocator.internal == reference.internal()
+        assert allocator.largest_free_block() == reference.largest()
+    check_invariants(allocator, total_memory)
+
+
+def test_freeing_everything_restores_the_arenas():
+    total_memory = MIN_BLOCK * 100
+    allocator = sim.BuddyAllocator(total_memory, MIN_BLOCK)
+    offsets = [allocator.allocate(MIN_BLOCK) for _ in range(100)]
+    assert None not in offsets and allocator.allocate(1) is None
+    for offset in reversed(offsets):
+        allocator.free(offset)
+    assert [sorted(free) for free in allocator.free_sets if free] == [[96 * MIN_BLOCK], [64 * MIN_BLOCK], [0]]
+    assert allocator.internal == 0
+
+
+def test_dynamic_segments_report_allocator_fragmentation():
+    config = {'page_size': MIN_BLOCK, 'total_memory': MIN_BLOCK * 64, 'segment_sizes': [MIN_BLOCK * 5]}
+    memory = sim.make_memory(config)
+    segments = sim.DynamicSegmentation(memory, sample_every=1)
+    rng = random.Random(4)
+    for event in range(400):
+        seg_id = rng.randrange(8)
+        roll = rng.random()
+        if roll < 0.4:
+            segments.allocate(seg_id, rng.randrange(1, MIN_BLOCK * 12))
+        elif roll < 0.7:
+            segments.free(seg_id)
+        else:
+            segments.resize(seg_id, rng.randrange(1, MIN_BLOCK * 12))
+        allocator = segments.allocator
+        spans = sorted((entry['base'], entry['base'] + allocator.block_size(entry['base']))
+                       for entry in memory.segment_table.values())
+        assert all(end <= start for (_, end), (start, _) in zip(spans, spans[1:]))
+        assert sum(allocator.block_size(entry['base']) - entry['limit']
+                   for entry in memory.segment_table.values()) == memory.fragmentation['internal']
+        assert memory.fragmentation['external'] == allocator.free_bytes - allocator.largest_free_block()
+    check_invariants(segments.allocator, config['total_memory'])
+    assert len(segments.timeline) == segments.events
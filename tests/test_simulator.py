@@ -0,0 +1,164 @@
+import itertools
+import random
+
+import pytest
+
+from simulator import sim
+
+CONFIG = {'page_size': 16, 'total_memory': 16 * 12, 'segment_sizes': [16 * 6, 16 * 4]}
+FRAMES = CONFIG['total_memory'] // CONFIG['page_size']
+SEGMENTS = len(CONFIG['segment_sizes'])
+
+
+def random_trace(seed, length=3000):
+    # a hot set plus a cold tail, with a few references to a segment that does not exist
+    rng = random.Random(seed)
+    trace = []
+    for _ in range(length):
+        page = rng.randrange(8) if rng.random() < 0.6 else rng.randrange(-5, 60)
+        trace.append((page, rng.randrange(SEGMENTS + 1)))
+    return trace
+
+
+def reference_lru(trace, frames, resident=()):
+    resident = list(resident)  # least recently used first
+    faults = replacements = 0
+    for page, seg_id in trace:
+        if seg_id >= SEGMENTS:
+            continue
+        if page in resident:
+            resident.remove(page)
+        else:
+            faults += 1
+            if len(resident) == frames:
+                resident.pop(0)
+                replacements += 1
+        resident.append(page)
+    return faults, replacements
+
+
+def reference_fifo(trace, frames):
+    # demand paging never refreshes a page on a hit, so it evicts in arrival order
+    resident = []
+    faults = replacements = 0
+    for page, seg_id in trace:
+        if seg_id >= SEGMENTS or page in resident:
+            continue
+        faults += 1
+        if len(resident) == frames:
+            resident.pop(0)
+            replacements += 1
+        resident.append(page)
+    return faults, replacements
+
+
+def reference_optimal(trace, frames, resident=()):
+    # references to unknown segments are skipped but still count as future uses, as in MemoryManager
+    pages = [page for page, _ in trace]
+    resident = set(resident)
+    faults = replacements = 0
+    for i, (page, seg_id) in enumerate(trace):
+        if seg_id >= SEGMENTS or page in resident:
+            continue
+        faults += 1
+        if len(resident) == frames:
+            future = pages[i + 1:]
+            resident.remove(max(resident, key=lambda p: future.index(p) if p in future else len(future)))
+            replacements += 1
+        resident.add(page)
+    return faults, replacements
+
+
+def counts(metrics):
+    return metrics['page_faults'], metrics['page_replacements']
+
+
+BACKENDS = ['dict', 'compact', 'numpy']
+
+
+def backend_config(backend):
+    if backend == 'numpy':
+        pytest.importorskip('numpy')
+    return dict(CONFIG, backend=backend)
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_lru_matches_reference(backend, seed):
+    trace = random_trace(seed)
+    assert counts(sim.simulate(trace, backend_config(backend), 'lru')) == reference_lru(trace, FRAMES)
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_optimal_matches_reference(backend, seed):
+    trace = random_trace(seed, length=800)
+    assert counts(sim.simulate(trace, backend_config(backend), 'optimal')) == reference_optimal(trace, FRAMES)
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_demand_matches_reference_fifo(backend, seed):
+    trace = random_trace(seed)
+    assert counts(sim.simulate(trace, backend_config(backend), 'demand')) == reference_fifo(trace, FRAMES)
+
+
+@pytest.mark.parametrize('algorithm', sim.ALGORITHMS)
+@pytest.mark.parametrize('backend', sim.CHECKPOINT_BACKENDS)
+def test_checkpoint_resume_matches_uninterrupted_run(tmp_path, backend, algorithm):
+    trace = random_trace(11)
+    config = dict(CONFIG, backend=backend)
+    expected = counts(sim.simulate(trace, config, algorithm))
+
+    cut = 1234
+    memory = sim.make_memory(config)
+    for step, page, seg_id, *extra in itertools.islice(sim.trace_steps(memory, trace, algorithm), cut):
+        step(page, seg_id, *extra)
+    path = str(tmp_path / 'run.ckpt')
+    sim.save_checkpoint(memory, path, cut)
+
+    resumed, offset = sim.load_checkpoint(path)
+    assert offset == cut
+    sim.run_trace(resumed, trace[offset:], algorithm, offset=offset)
+    assert counts(sim.collect_metrics(resumed)) == expected
+
+
+@pytest.mark.parametrize('frames', [1, 3, 8])
+def test_compact_page_table_handles_sparse_and_negative_pages(frames):
+    # few frames and widely spread page numbers force long probe runs and backward-shift deletions
+    rng = random.Random(frames)
+    trace = [(rng.choice([rng.randrange(-10, 10), rng.randrange(2 ** 40), rng.randrange(100) * 1024]), 0)
+             for _ in range(5000)]
+    memory = sim.CompactMemoryManager(1, frames, None)
+    sim.run_trace(memory, trace, 'lru')
+    assert counts(sim.collect_metrics(memory)) == reference_lru(trace, frames)
+    assert sorted(page for page in memory.table_page if page != sim.FREE_PAGE) == \
+        sorted(page for page in memory.frame_page if page != sim.FREE_PAGE)
+
+
+def warm_checkpoint(tmp_path, backend, algorithm, trace, cut):
+    memory = sim.make_memory(dict(CONFIG, backend=backend))
+    for step, page, seg_id, *extra in itertools.islice(sim.trace_steps(memory, trace, algorithm), cut):
+        step(page, seg_id, *extra)
+    path = str(tmp_path / f'{backend}-{algorithm}.ckpt')
+    sim.save_checkpoint(memory, path, cut)
+    return path
+
+
+@pytest.mark.parametrize('resume_algorithm', sim.ALGORITHMS)
+@pytest.mark.parametrize('warm_algorithm', sim.ALGORITHMS)
+def test_checkpoint_branches_into_another_algorithm(tmp_path, warm_algorithm, resume_algorithm):
+    trace = random_trace(12)
+    cut = 1000
+    results = {}
+    for backend in sim.CHECKPOINT_BACKENDS:
+        resumed, offset = sim.load_checkpoint(warm_checkpoint(tmp_path, backend, warm_algorithm, trace, cut))
+        resident = [page for page in resumed.page_table] if backend == 'dict' else None
+        faults, replacements = resumed.page_faults, resumed.page_replacements
+        sim.run_trace(resumed, trace[offset:], resume_algorithm, offset=offset)
+        results[backend] = (resumed.page_faults - faults, resumed.page_replacements - replacements)
+        if backend == 'dict' and resume_algorithm == 'lru':
+            assert results[backend] == reference_lru(trace[offset:], FRAMES, resident)
+        if backend == 'dict' and resume_algorithm == 'optimal':
+            assert results[backend] == reference_optimal(trace[offset:], FRAMES, resident)
+    assert results['dict'] == results['compact']
@@ -0,0 +1,24 @@
+import pytest
+
+from simulator import sim
+
+CONFIG = {'page_size': 16, 'total_memory': 16 * 4, 'segment_sizes': [16 * 2, 16 * 2]}
+TRACE = [(-1, 0), (2, 0), (2 ** 40, 1), (-1, 0), (5, 1), (7, 0), (2, 0), (2 ** 40, 1), (-3, 0), (5, 1)]
+
+
+@pytest.mark.parametrize('backend', ['dict', 'compact', 'numpy'])
+def test_sweep_accepts_negative_and_wide_page_numbers(backend):
+    if backend == 'numpy':
+        pytest.importorskip('numpy')
+    rows = sim.run_sweep(TRACE, [16, 32], [CONFIG['total_memory']], [CONFIG['segment_sizes']], ['lru', 'optimal'],
+                         backend, workers=1)
+    assert len(rows) == 4
+    for row in rows:
+        config = dict(CONFIG, page_size=row['page_size'], backend='dict')
+        expected = sim.simulate(TRACE, config, row['algorithm'])
+        assert (row['page_faults'], row['page_replacements']) == (expected['page_faults'], expected['page_replacements'])
+
+
+def test_sweep_rejects_page_numbers_beyond_64_bits():
+    with pytest.raises(ValueError):
+        sim.run_sweep([(2 ** 64, 0)], [16], [64], workers=1)
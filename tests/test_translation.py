@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from simulator import sim
+
+PAGE_SIZE = 64
+PTE_SIZE = 8
+LEVELS = 3
+FRAMES = 10
+CONFIG = {'page_size': PAGE_SIZE, 'total_memory': PAGE_SIZE * FRAMES, 'segment_sizes': [PAGE_SIZE * 8, PAGE_SIZE * 8]}
+COSTS = {'tlb_cycles': 1, 'memory_cycles': 50, 'fault_cycles': 5000}
+
+
+def random_trace(seed, length=3000):
+    # a hot set small enough for the TLB, a wider warm set and a few references to an unknown segment
+    rng = random.Random(seed)
+    trace = []
+    for _ in range(length):
+        roll = rng.random()
+        page = rng.randrange(6) if roll < 0.5 else rng.randrange(-4, 30) if roll < 0.9 else rng.randrange(1000)
+        trace.append((page, rng.randrange(3)))
+    return trace
+
+
+def reference_translation(trace, entries, ways):
+    # LRU memory in front of a set-associative TLB with LRU sets, modelled with plain lists
+    sets = [[] for _ in range(entries // ways)]
+    resident = []  # least recently used first
+    fanout = PAGE_SIZE // PTE_SIZE
+    tables = set()
+    hits = walks = faults = shootdowns = segment_faults = cycles = 0
+
+    def walk(page):
+        for level in range(LEVELS):
+            tables.add((level, page // fanout ** (LEVELS - level)))
+        return LEVELS * COSTS['memory_cycles']
+
+    for page, seg_id in trace:
+        if seg_id >= len(CONFIG['segment_sizes']):
+            segment_faults += 1
+            continue
+        tlb_set = sets[page % len(sets)]
+        cost = COSTS['tlb_cycles'] + COSTS['memory_cycles']
+        if page in resident:
+            resident.remove(page)
+            resident.append(page)
+            if page in tlb_set:
+                tlb_set.remove(page)
+                hits += 1
+            else:
+                cost += walk(page)
+                walks += 1
+                if len(tlb_set) == ways:
+                    tlb_set.pop(0)
+            tlb_set.append(page)
+        else:
+            faults += 1
+            walks += 1
+            cost += walk(page) + COSTS['fault_cycles']
+            if len(resident) == FRAMES:
+                victim = resident.pop(0)
+                victim_set = sets[victim % len(sets)]
+                if victim in victim_set:
+                    victim_set.remove(victim)
+                shootdowns += 1
+            resident.append(page)
+            if page in tlb_set:
+                tlb_set.remove(page)
+            elif len(tlb_set) == ways:
+                tlb_set.pop(0)
+            tlb_set.append(page)
+        cycles += cost
+    return {
+        'tlb_hits': hits,
+        'page_walks': walks,
+        'walk_memory_accesses': walks * LEVELS,
+        'page_faults': faults,
+        'segment_faults': segment_faults,
+        'tlb_shootdowns': shootdowns,
+        'page_table_pages': len(tables),
+        'total_cycles': cycles,
+    }
+
+
+@pytest.mark.parametrize('entries, ways', [(4, 1), (8, 2), (8, 8), (16, 4)])
+@pytest.mark.parametrize('backend', sim.CHECKPOINT_BACKENDS)
+def test_translation_matches_reference(backend, entries, ways):
+    trace = random_trace(entries * ways)
+    translation = dict(COSTS, tlb_entries=entries, tlb_ways=ways, levels=LEVELS, pte_size=PTE_SIZE)
+    metrics = sim.simulate(trace, dict(CONFIG, backend=backend, translation=translation), 'lru')
+    report = metrics['translation']
+    expected = reference_translation(trace, entries, ways)
+    assert {key: report[key] for key in expected} == expected
+    assert report['page_faults'] == metrics['page_faults']
+    assert report['references'] == len(trace)
+
+
+def test_shootdown_removes_the_victims_entry():
+    # two frames and a TLB big enough to hold every page: only shootdowns can force a walk on a resident page
+    config = {'page_size': PAGE_SIZE, 'total_memory': PAGE_SIZE * 2, 'segment_sizes': [PAGE_SIZE * 4]}
+    layer = sim.TranslationLayer(tlb_entries=8, tlb_ways=8)
+    layer.run(sim.make_memory(config), [(0, 0), (1, 0), (2, 0), (1, 0), (0, 0), (1, 0)], 'lru')
+    report = layer.export()
+    assert report['tlb_shootdowns'] == 2
+    assert report['tlb_hits'] == 2
+    assert report['page_walks'] == 4